@@ -0,0 +1,62 @@
+"""Times buffer preparation per frame for the 7-color ACeP drivers, per dithering mode.
+
+Usage: python -m benchmarks.bench_color
+"""
+import importlib
+import os
+import time
+
+# Select the virtual panel before any driver imports epdconfig
+os.environ.setdefault("EPD_BACKEND", "virtual")
+os.environ.setdefault("EPD_VIRTUAL_SPEED", "0")
+
+from PIL import Image
+
+from src.lib.waveshare_epd import packing
+
+DRIVERS = ["epd7in3f", "epd5in65f", "epd4in01f"]
+DITHERS = [packing.DITHER_NONE, packing.DITHER_FLOYD_STEINBERG, packing.DITHER_ORDERED]
+ROUNDS = 3
+
+
+def legacy_getbuffer(image, width, height):
+    """Quantize, then pack nibbles in a Python loop, as the drivers used to."""
+    pal_image = Image.new("P", (1, 1))
+    pal_image.putpalette(packing.PALETTE_7COLOR + (0, 0, 0) * 249)
+    buf_7color = bytearray(image.convert("RGB").quantize(palette=pal_image).tobytes('raw'))
+    buf = [0x00] * int(width * height / 2)
+    idx = 0
+    for i in range(0, len(buf_7color), 2):
+        buf[idx] = (buf_7color[i] << 4) + buf_7color[i + 1]
+        idx += 1
+    return buf
+
+
+def photo(width, height):
+    noise = Image.effect_noise((width, height), 90)
+    gradient = Image.linear_gradient('L').resize((width, height))
+    return Image.merge('RGB', (noise, gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    for name in DRIVERS:
+        epd = importlib.import_module(f"src.lib.waveshare_epd.{name}").EPD()
+        image = photo(epd.width, epd.height)
+        line = f"{name:<10} {epd.width}x{epd.height:<4}"
+        line += f" legacy {best_of(lambda: legacy_getbuffer(image, epd.width, epd.height)) * 1000:7.1f} ms"
+        for dither in DITHERS:
+            line += f"  {dither} {best_of(lambda: epd.getbuffer(image, dither)) * 1000:6.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compares full json decoding with the field-selective journey decoder.
+
+Usage: python -m benchmarks.bench_decode [recorded_payload.json ...]
+"""
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.payloads import load_payloads
+from src import journey_decoder
+from src.journey_decoder import decode_journeys, slim_journeys
+from src.skanetrafiken import JourneyPlanner
+
+ROUNDS = 20
+
+
+def full_json(payload: bytes):
+    return json.loads(payload).get("journeys", [])
+
+
+def streaming(payload: bytes):
+    return decode_journeys(io.BytesIO(payload))
+
+
+def fallback(payload: bytes):
+    return slim_journeys(json.load(io.BytesIO(payload)))
+
+
+def measure(decoder, payload: bytes):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        decoder(payload)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    decoder(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(paths):
+    planner = JourneyPlanner("0", "0")
+    decoders = {"response.json()": full_json, "json + slim": fallback}
+    if journey_decoder.ijson is not None:
+        decoders["ijson streaming"] = streaming
+
+    for name, payload in load_payloads(paths).items():
+        expected = [planner.get_route_status(route) for route in full_json(payload)]
+        print(f"{name}: {len(payload) / 1024:.1f} KiB")
+        for label, decoder in decoders.items():
+            statuses = [planner.get_route_status(route) for route in decoder(payload)]
+            assert statuses == expected, f"{label} decoded different route statuses"
+            seconds, peak = measure(decoder, payload)
+            print(f"  {label:<18} {seconds * 1000:8.2f} ms  peak {peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
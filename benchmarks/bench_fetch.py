@@ -0,0 +1,92 @@
+"""Measures route fetching against the local mock API.
+
+Usage: python -m benchmarks.bench_fetch [--routes 6] [--latency 200] [--jitter 80] [--error-rate 0.1]
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.mock_api import MockOptions, start_server
+from src.config import CacheConfig, HttpConfig
+from src.http_session import HttpSession
+from src.journey_fetcher import JourneyFetcher
+from src.request_coalescer import RequestCoalescer
+from src.response_cache import ResponseCache
+from src.skanetrafiken import JourneyPlanner
+
+
+def make_planners(routes: int, base_url: str, cache: ResponseCache = None):
+    session = HttpSession(HttpConfig(base_url=base_url))
+    coalescer = RequestCoalescer()
+    planners = {
+        f"route {i}": JourneyPlanner("9021012080040000", f"90210120812{i:05d}", session=session,
+                                     cache=cache, coalescer=coalescer)
+        for i in range(routes)
+    }
+    return planners, session
+
+
+def run_sequential(planners):
+    failures = 0
+    for planner in planners.values():
+        try:
+            planner.get_journey_times()
+        except Exception:
+            failures += 1
+    return failures
+
+
+def run_concurrent(fetcher):
+    results = fetcher.fetch_all()
+    return sum(result is None for result in results.values())
+
+
+def timed(label, rounds, fn):
+    elapsed = []
+    failures = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        failures += fn()
+        elapsed.append(time.perf_counter() - started)
+    elapsed.sort()
+    print(f"  {label:<22} median {elapsed[len(elapsed) // 2] * 1000:8.1f} ms  "
+          f"max {elapsed[-1] * 1000:8.1f} ms  failed routes {failures}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=200.0)
+    parser.add_argument("--jitter", type=float, default=80.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cancel-rate", type=float, default=0.1)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    options = MockOptions(latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate,
+                          cancel_rate=args.cancel_rate, delay_rate=0.3, seed=1)
+    server, base_url = start_server(options)
+    print(f"{args.routes} routes, {args.latency:.0f}±{args.jitter:.0f} ms latency, "
+          f"error rate {args.error_rate}, mock at {base_url}")
+
+    planners, session = make_planners(args.routes, base_url)
+    timed("sequential", args.rounds, lambda: run_sequential(planners))
+    fetcher = JourneyFetcher(planners, args.deadline)
+    timed("concurrent", args.rounds, lambda: run_concurrent(fetcher))
+    fetcher.shutdown()
+    print(f"  connections: {session.stats()}")
+
+    cache = ResponseCache(CacheConfig(ttl=60.0))
+    planners, _ = make_planners(args.routes, base_url, cache)
+    fetcher = JourneyFetcher(planners, args.deadline)
+    timed("concurrent + cache", args.rounds, lambda: run_concurrent(fetcher))
+    fetcher.shutdown()
+    print(f"  cache: {cache.stats()}")
+    print(f"  mock api: {server.api.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
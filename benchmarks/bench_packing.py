@@ -0,0 +1,102 @@
+"""Checks the 1bpp drivers' getbuffer against the old per-pixel loops and times both.
+
+Usage: python -m benchmarks.bench_packing [--drivers epd7in5_V2 epd4in2 ...]
+"""
+import argparse
+import importlib
+import os
+import time
+
+# Select the virtual panel before any driver imports epdconfig
+os.environ.setdefault("EPD_BACKEND", "virtual")
+os.environ.setdefault("EPD_VIRTUAL_SPEED", "0")
+
+from PIL import Image
+
+# Drivers whose getbuffer converted to '1' and then set bits pixel by pixel
+LOOP_DRIVERS = [
+    "epd13in3b", "epd13in3k", "epd1in02", "epd1in54", "epd1in54_V2", "epd1in54c", "epd2in13",
+    "epd2in13b_V3", "epd2in13bc", "epd2in13d", "epd2in66", "epd2in66b", "epd2in7", "epd2in7_V2",
+    "epd2in7b", "epd2in7b_V2", "epd2in9", "epd2in9_V2", "epd2in9b_V3", "epd2in9b_V4", "epd2in9bc",
+    "epd2in9d", "epd3in52", "epd3in7", "epd4in2", "epd4in26", "epd4in2_V2", "epd4in2b_V2",
+    "epd4in2b_V2_old", "epd4in2bc", "epd5in79", "epd5in79b", "epd5in83_V2", "epd5in83b_V2",
+    "epd5in83bc", "epd7in5b_HD", "epd7in5bc",
+]
+# Drivers whose getbuffer rotated, converted and used Image.tobytes, inverting with a loop
+INVERTED_DRIVERS = ["epd7in5_V2", "epd7in5_V2_old", "epd7in5b_V2", "epd7in5b_V2_old"]
+ROUNDS = 3
+
+
+def loop_1bpp(image, width, height):
+    """The per-pixel packing the loop drivers used, rows padded to whole bytes."""
+    linewidth = (width + 7) // 8
+    buf = [0xFF] * (linewidth * height)
+    mono = image.convert('1')
+    imwidth, imheight = mono.size
+    pixels = mono.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[x // 8 + y * linewidth] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx, newy = y, height - x - 1
+                if pixels[x, y] == 0:
+                    buf[newx // 8 + newy * linewidth] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def inverted_1bpp(image, width, height):
+    """Rotate, convert and invert byte by byte, as the 7.5\" V2 drivers did."""
+    if image.size == (height, width):
+        image = image.rotate(90, expand=True)
+    buf = bytearray(image.convert('1').tobytes('raw'))
+    for i in range(len(buf)):
+        buf[i] ^= 0xFF
+    return buf
+
+
+def test_images(width, height):
+    noise = Image.effect_noise((width, height), 80)
+    rgb = Image.merge('RGB', (noise, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT), noise))
+    for image in (noise.convert('1'), noise, rgb):
+        yield image
+        yield image.transpose(Image.Transpose.ROTATE_270)
+
+
+def timed(fn, image):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn(image)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drivers", nargs="*", default=LOOP_DRIVERS + INVERTED_DRIVERS)
+    args = parser.parse_args()
+
+    for name in args.drivers:
+        try:
+            module = importlib.import_module(f"src.lib.waveshare_epd.{name}")
+        except ImportError as e:
+            print(f"{name:<16} skipped: {e}")
+            continue
+        epd = module.EPD()
+        reference = inverted_1bpp if name in INVERTED_DRIVERS else loop_1bpp
+        old = lambda image: reference(image, epd.width, epd.height)
+        for image in test_images(epd.width, epd.height):
+            assert bytes(epd.getbuffer(image)) == bytes(b & 0xFF for b in old(image)), \
+                f"{name}: getbuffer differs for a {image.mode} {image.size} image"
+        image = next(test_images(epd.width, epd.height))
+        before, after = timed(old, image), timed(epd.getbuffer, image)
+        print(f"{name:<16} {epd.width}x{epd.height:<4} loop {before * 1000:8.2f} ms  "
+              f"packed {after * 1000:6.2f} ms  ({before / after:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
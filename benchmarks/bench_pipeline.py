@@ -0,0 +1,109 @@
+"""Times each stage of a journey refresh on the virtual panel and reports peak memory per stage.
+
+Usage: python -m benchmarks.bench_pipeline [--rounds 5] [--output results.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+# Select the virtual panel before any driver imports epdconfig
+os.environ.setdefault("EPD_BACKEND", "virtual")
+os.environ.setdefault("EPD_VIRTUAL_SPEED", "0")
+
+from PIL import Image
+
+from benchmarks.payloads import sample_departures
+from main import DisplayController
+
+MAX_ROUTES = 6
+
+
+def measure(fn, rounds):
+    """Best wall time over `rounds` calls, then the tracemalloc peak of one more call."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def art_source(width=1200, height=900):
+    """A photo-sized RGB gradient standing in for an image from img/."""
+    gradient = Image.radial_gradient('L').resize((width, height))
+    return Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), gradient))
+
+
+def stages(controller):
+    display = controller.journey_display
+    manager, epd = display.display_manager, display.epd
+    width = manager.config.width
+
+    def journey_frame(routes):
+        section_width = width // routes
+        image = manager.create_base_image()
+        for i in range(routes):
+            manager.draw_journey_section(image, sample_departures(seed=i), f"Route {i} → Lund",
+                                         i * section_width, section_width)
+        return image
+
+    frame = journey_frame(2)
+    buffer = epd.getbuffer(frame)
+    art = art_source()
+    gray = controller.prepare_art_image(art).convert('L')
+    gray_buffer = epd.getbuffer_4Gray(gray)
+
+    yield "create_base_image", lambda: manager.create_base_image()
+    for routes in range(1, MAX_ROUTES + 1):
+        yield f"draw_journey_section[{routes}]", lambda routes=routes: journey_frame(routes)
+    yield "getbuffer", lambda: epd.getbuffer(frame)
+    yield "display", lambda: epd.display(buffer)
+    yield "display_region", lambda: epd.display_region(buffer, 0, 0, 160, 60)
+    yield "prepare_art_image", lambda: controller.prepare_art_image(art)
+    yield "getbuffer_4Gray", lambda: epd.getbuffer_4Gray(gray)
+    yield "display_4Gray", lambda: epd.display_4Gray(gray_buffer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    controller = DisplayController()
+    results = {name: measure(fn, args.rounds) for name, fn in stages(controller)}
+    controller.cleanup()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["stages"]
+
+    for name, result in results.items():
+        line = f"{name:<24} {result['seconds'] * 1000:9.2f} ms  peak {result['peak_bytes'] / 1024:8.1f} KiB"
+        if name in baseline:
+            line += f"  ({baseline[name]['seconds'] / result['seconds']:.2f}x vs baseline)"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "rounds": args.rounds,
+                "stages": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
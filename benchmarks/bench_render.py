@@ -0,0 +1,60 @@
+"""Times one journey frame on 800x480, redrawing the static layout vs. copying the template.
+
+Usage: python -m benchmarks.bench_render [--routes 2]
+"""
+import argparse
+import time
+
+from benchmarks.payloads import sample_departures
+from src.config import AppConfig, DisplayConfig
+from src.display_config import DisplayManager
+
+FONT_PATH = AppConfig().display.font_path
+ROUNDS = 50
+
+
+def redraw_frame(manager, routes, section_width):
+    image = manager.create_base_image()
+    for i, (title, departures) in enumerate(routes):
+        manager.draw_journey_section(image, departures, title, i * section_width, section_width)
+    return image
+
+
+def template_frame(manager, routes, section_width):
+    image = manager.create_base_image([title for title, _ in routes])
+    for i, (_, departures) in enumerate(routes):
+        manager.draw_journey_rows(image, departures, i * section_width, section_width)
+    return image
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=2)
+    args = parser.parse_args()
+
+    manager = DisplayManager(None, DisplayConfig(width=800, height=480, font_path=FONT_PATH))
+    routes = [(f"Route {i} → Lund", sample_departures(seed=i)) for i in range(args.routes)]
+    section_width = manager.config.width // args.routes
+
+    if args.routes == 2:
+        assert redraw_frame(manager, routes, section_width).tobytes() == \
+            template_frame(manager, routes, section_width).tobytes()
+
+    redraw = best_of(lambda: redraw_frame(manager, routes, section_width))
+    template = best_of(lambda: template_frame(manager, routes, section_width))
+    print(f"{args.routes} routes on 800x480")
+    print(f"  redraw static layout: {redraw * 1000:7.2f} ms per frame")
+    print(f"  copy layout template: {template * 1000:7.2f} ms per frame ({redraw / template:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Times pushing one 7.5" frame through epdconfig's bulk SPI path per buffer type.
+
+Usage: python -m benchmarks.bench_spi [--hz 4000000]
+"""
+import argparse
+import os
+import time
+
+# Select the virtual panel before epdconfig probes for hardware
+os.environ.setdefault("EPD_BACKEND", "virtual")
+
+from src.lib.waveshare_epd import epdconfig
+
+FRAME_BYTES = 800 * 480 // 8
+ROUNDS = 20
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hz", type=int, default=epdconfig.SPI_SPEED_HZ)
+    args = parser.parse_args()
+
+    bufsiz = epdconfig.spidev_bufsiz()
+    frame = bytes(range(256)) * (FRAME_BYTES // 256) + bytes(FRAME_BYTES % 256)
+    chunks = []
+    sink = chunks.append
+    print(f"spidev bufsiz {bufsiz} bytes, {FRAME_BYTES} byte frame")
+    for label, data in (("list", list(frame)), ("inverted list", [~b for b in frame]),
+                        ("bytes", frame), ("bytearray", bytearray(frame)), ("memoryview", memoryview(frame))):
+        seconds = best_of(lambda: (chunks.clear(), epdconfig.write_chunked(sink, data, bufsiz, args.hz)))
+        print(f"{label:<14} {seconds * 1000:7.3f} ms host side, {len(chunks)} transfers")
+    print(f"bus limit at {args.hz} Hz: {FRAME_BYTES * 8 / args.hz * 1000:.1f} ms per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Times clock and departure-row rendering with the text-run cache on and off.
+
+Usage: python -m benchmarks.bench_text
+"""
+import time
+
+from PIL import Image
+
+from benchmarks.payloads import sample_departures
+from src.config import AppConfig, DisplayConfig
+from src.display_config import DisplayManager
+
+FONT_PATH = AppConfig().display.font_path
+ROUNDS = 200
+
+
+def draw_clock(manager, image, tick):
+    minutes = tick % 240 + 360
+    manager.draw_text(image, (10, 10), f"{minutes // 60:02d}:{minutes % 60:02d}", 'large')
+
+
+def draw_rows(manager, image, tick, departures):
+    manager.draw_journey_rows(image, departures[tick % 2], 0, 400)
+    manager.draw_journey_rows(image, departures[(tick + 1) % 2], 400, 400)
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for tick in range(ROUNDS):
+            fn(tick)
+        best = min(best, time.perf_counter() - started)
+    return best / ROUNDS
+
+
+def main():
+    cached = DisplayManager(None, DisplayConfig(800, 480, FONT_PATH))
+    uncached = DisplayManager(None, DisplayConfig(800, 480, FONT_PATH, text_cache_size=0))
+    departures = [sample_departures(seed=1), sample_departures(seed=2)]
+
+    for tick in range(3):
+        images = []
+        for manager in (cached, uncached):
+            image = Image.new('1', (800, 480), 255)
+            draw_clock(manager, image, tick)
+            draw_rows(manager, image, tick, departures)
+            images.append(image.tobytes())
+        assert images[0] == images[1], "cached text runs differ from FreeType output"
+
+    for label, stage in (("clock", lambda m, img, t: draw_clock(m, img, t)),
+                         ("rows", lambda m, img, t: draw_rows(m, img, t, departures))):
+        results = {}
+        for name, manager in (("off", uncached), ("on", cached)):
+            image = Image.new('1', (800, 480), 255)
+            results[name] = best_of(lambda tick: stage(manager, image, tick))
+        print(f"{label:<6} cache off {results['off'] * 1000:7.3f} ms  "
+              f"cache on {results['on'] * 1000:7.3f} ms  ({results['off'] / results['on']:.1f}x)")
+    print(f"text-run cache: {cached.text_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
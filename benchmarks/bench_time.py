@@ -0,0 +1,66 @@
+"""Compares the old regex/strptime/pytz timestamp chain with TimeManager's table lookups.
+
+Usage: python -m benchmarks.bench_time
+"""
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytz
+
+from src.time_manager import TimeManager
+
+ROUNDS = 5
+SWEDEN_TZ = pytz.timezone('Europe/Stockholm')
+
+
+def legacy_departure(timestamp: str):
+    """The pre-Departure path: regex, strptime, localize/astimezone, then strptime again."""
+    match = re.search(r"(\d{2}):(\d{2})", timestamp)
+    time_obj = datetime.strptime(match.group(1) + ":" + match.group(2), "%H:%M")
+    utc_time = pytz.UTC.localize(datetime.combine(datetime.utcnow().date(), time_obj.time()))
+    time_str = utc_time.astimezone(SWEDEN_TZ).strftime("%H:%M")
+
+    current_time = datetime.now(SWEDEN_TZ)
+    check_time = SWEDEN_TZ.localize(
+        datetime.combine(current_time.date(), datetime.strptime(time_str, "%H:%M").time())
+    )
+    if check_time < current_time - timedelta(hours=1):
+        check_time += timedelta(days=1)
+    return time_str, check_time > current_time + timedelta(minutes=5)
+
+
+def table_departure(time_manager: TimeManager, timestamp: str):
+    epoch = time_manager.parse_timestamp(timestamp)
+    return time_manager.format_time(epoch), time_manager.is_future_timestamp(epoch, 5)
+
+
+def best_of(fn, timestamps):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for timestamp in timestamps:
+            fn(timestamp)
+        best = min(best, time.perf_counter() - started)
+    return best / len(timestamps)
+
+
+def main():
+    time_manager = TimeManager()
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    timestamps = [(now + timedelta(minutes=7 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+                  for i in range(1, 2001)]
+
+    for timestamp in timestamps[:100]:
+        legacy_time, _ = legacy_departure(timestamp)
+        table_time, _ = table_departure(time_manager, timestamp)
+        assert legacy_time == table_time, (timestamp, legacy_time, table_time)
+
+    legacy = best_of(legacy_departure, timestamps)
+    table = best_of(lambda ts: table_departure(time_manager, ts), timestamps)
+    print(f"regex + strptime + pytz: {legacy * 1e6:7.2f} us per departure")
+    print(f"parse + offset table:    {table * 1e6:7.2f} us per departure ({legacy / table:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
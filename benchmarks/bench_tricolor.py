@@ -0,0 +1,87 @@
+"""Times splitting an RGB frame into black and red planes, and the bc 4-bit merge.
+
+Usage: python -m benchmarks.bench_tricolor
+"""
+import importlib
+import os
+import time
+
+# Select the virtual panel before any driver imports epdconfig
+os.environ.setdefault("EPD_BACKEND", "virtual")
+os.environ.setdefault("EPD_VIRTUAL_SPEED", "0")
+
+from PIL import Image, ImageDraw
+
+from src.lib.waveshare_epd import packing
+
+DRIVERS = ["epd7in5bc", "epd7in5b_V2", "epd4in2bc", "epd2in9bc", "epd13in3b"]
+ROUNDS = 3
+
+
+def journey_frame(width, height):
+    """Black departure rows with red delay markers on white."""
+    image = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for y in range(10, height - 20, 40):
+        draw.rectangle((10, y, width * 2 // 3, y + 20), fill=(0, 0, 0))
+        draw.rectangle((width * 2 // 3 + 10, y, width - 10, y + 20), fill=(255, 0, 0))
+    return image
+
+
+def legacy_merge(imageblack, imagered, width, height):
+    """The bit-by-bit nibble merge 7in5bc.display used to run."""
+    out = bytearray()
+    for i in range(0, int(width / 8 * height)):
+        temp1 = imageblack[i]
+        temp2 = imagered[i]
+        j = 0
+        while j < 8:
+            if (temp2 & 0x80) == 0x00:
+                temp3 = 0x04
+            elif (temp1 & 0x80) == 0x00:
+                temp3 = 0x00
+            else:
+                temp3 = 0x03
+            temp3 = (temp3 << 4) & 0xFF
+            temp1 = (temp1 << 1) & 0xFF
+            temp2 = (temp2 << 1) & 0xFF
+            j += 1
+            if (temp2 & 0x80) == 0x00:
+                temp3 |= 0x04
+            elif (temp1 & 0x80) == 0x00:
+                temp3 |= 0x00
+            else:
+                temp3 |= 0x03
+            temp1 = (temp1 << 1) & 0xFF
+            temp2 = (temp2 << 1) & 0xFF
+            out.append(temp3)
+            j += 1
+    return out
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    for name in DRIVERS:
+        epd = importlib.import_module(f"src.lib.waveshare_epd.{name}").EPD()
+        frame = journey_frame(epd.width, epd.height)
+        black, red = epd.getbuffer_rgb(frame)
+        line = f"{name:<12} {epd.width}x{epd.height:<4} getbuffer_rgb {best_of(lambda: epd.getbuffer_rgb(frame)) * 1000:7.2f} ms"
+        if name.endswith("bc"):
+            assert bytes(packing.merge_nibbles(black, red, epd.width, epd.height)) == \
+                bytes(legacy_merge(black, red, epd.width, epd.height)), f"{name}: merged nibbles differ"
+            before = best_of(lambda: legacy_merge(black, red, epd.width, epd.height))
+            after = best_of(lambda: packing.merge_nibbles(black, red, epd.width, epd.height))
+            line += f"  merge loop {before * 1000:8.1f} ms  packed {after * 1000:6.2f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Checks that every driver's display and clear methods send the same SPI stream as before.
+
+Each method is fed fixed buffers on the virtual panel, which records the
+[command, data] pairs the controller would receive. The digests are compared
+with benchmarks/streams/driver_streams.json; --record rewrites that file.
+
+Usage: python -m benchmarks.check_streams [--record] [--drivers epd7in5_V2 ...]
+"""
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+
+# Record on the virtual panel without waiting, so every busy wait returns at once
+os.environ["EPD_BACKEND"] = "virtual"
+os.environ["EPD_VIRTUAL_SPEED"] = "0"
+os.environ["EPD_VIRTUAL_BUSY_LEVEL"] = "toggle"
+
+from PIL import Image
+
+from src.lib import waveshare_epd
+from src.lib.waveshare_epd import epdconfig
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "streams", "driver_streams.json")
+METHOD_PREFIXES = ("display", "Display", "Clear", "clear")
+# Arguments that are not frame buffers
+SCALARS = {"color": 0xFF, "mode": 0, "NUM": 1, "Xstart": 16, "Ystart": 8, "Xend": 96, "Yend": 40,
+           "x": 16, "y": 8, "w": 80, "h": 32}
+
+
+def pattern(length, seed):
+    """A fixed byte pattern that exercises every bit position."""
+    return bytearray((i * 37 + (i >> 8) * 11 + seed) & 0xFF for i in range(length))
+
+
+def buffer_length(epd, method):
+    white = Image.new("RGB", (epd.width, epd.height), (255, 255, 255))
+    if "4Gray" in method and hasattr(epd, "getbuffer_4Gray"):
+        return len(epd.getbuffer_4Gray(white))
+    return len(epd.getbuffer(white))
+
+
+def cases(epd):
+    for name, method in inspect.getmembers(epd, inspect.ismethod):
+        if not name.startswith(METHOD_PREFIXES):
+            continue
+        params = list(inspect.signature(method).parameters.values())
+        if any(p.name not in SCALARS and p.default is not p.empty for p in params):
+            continue
+        length = buffer_length(epd, name)
+        args = []
+        for seed, param in enumerate(params):
+            if param.name in SCALARS:
+                args.append(SCALARS[param.name] if param.default is param.empty else param.default)
+            else:
+                args.append(pattern(length, seed))
+        yield name, method, args
+
+
+def record(method, args):
+    transcript = epdconfig.implementation.transcript = []
+    epdconfig.implementation.busy_toggle = 0
+    method(*args)
+    epdconfig.implementation.transcript = None
+    digest = hashlib.sha256()
+    for command, data in transcript:
+        digest.update(b"C%d:%d:" % (-1 if command is None else command, len(data)))
+        digest.update(data)
+    return {"commands": len(transcript), "bytes": sum(len(d) for _, d in transcript),
+            "sha256": digest.hexdigest()}
+
+
+def all_drivers():
+    return sorted(m.name for m in pkgutil.iter_modules(waveshare_epd.__path__) if m.name.startswith("epd") and m.name != "epdconfig")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--record", action="store_true", help="rewrite the fixture from the current drivers")
+    parser.add_argument("--drivers", nargs="*", default=all_drivers())
+    args = parser.parse_args()
+
+    results = {}
+    skipped = []
+    for name in args.drivers:
+        try:
+            epd = importlib.import_module(f"src.lib.waveshare_epd.{name}").EPD()
+        except ImportError as e:
+            print(f"{name:<16} skipped: {e}")
+            skipped.append(name)
+            continue
+        for method_name, method, method_args in cases(epd):
+            results[f"{name}.{method_name}"] = record(method, method_args)
+
+    if args.record:
+        with open(FIXTURE, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"recorded {len(results)} streams to {FIXTURE}")
+        return
+
+    with open(FIXTURE) as f:
+        expected = json.load(f)
+    unknown = [key for key in results if key not in expected]
+    failures = [key for key in results if key in expected and expected[key] != results[key]]
+    # A driver that no longer imports must not pass by dropping out of the comparison
+    missing = [key for key in expected if key.split(".")[0] in skipped]
+    for key in unknown:
+        print(f"{key:<36} has no recorded stream yet")
+    for key in failures:
+        print(f"{key:<36} differs: expected {expected[key]}, got {results[key]}")
+    for key in missing:
+        print(f"{key:<36} is recorded but its driver was skipped")
+    print(f"{len(results) - len(unknown) - len(failures)}/{len(results) - len(unknown) + len(missing)} streams match")
+    if failures or missing:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
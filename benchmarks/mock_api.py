@@ -0,0 +1,186 @@
+"""Local stand-in for the Skånetrafiken Journey API that replays recorded payloads.
+
+Record fixtures with
+    python -m src.skanetrafiken --from-point ID --to-point ID --record benchmarks/fixtures/ID_ID.json
+and serve them with
+    python -m benchmarks.mock_api --latency 150 --jitter 50 --error-rate 0.05 --cancel-rate 0.1
+then point the planner at it, e.g. SKANETRAFIKEN_BASE_URL=http://127.0.0.1:8080 python main.py
+
+A fixture named "<fromPointId>_<toPointId>.json" answers that pair; any other
+query gets the fixtures in turn. Without fixtures a synthetic payload is served.
+"""
+import argparse
+import gzip
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.payloads import synthetic_payload
+from src.skanetrafiken import JOURNEY_PATH
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+_TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})")
+
+
+@dataclass
+class MockOptions:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    cancel_rate: float = 0.0
+    delay_rate: float = 0.0
+    rebase_minutes: Optional[int] = 8
+    seed: Optional[int] = None
+
+
+class MockJourneyApi:
+    """Serves fixtures with the configured latency, jitter, failures and deviations."""
+
+    def __init__(self, options: MockOptions, fixture_dir: Path = FIXTURE_DIR):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.fixtures: Dict[str, dict] = {
+            path.stem: json.loads(path.read_text(encoding="utf-8"))
+            for path in sorted(Path(fixture_dir).glob("*.json"))
+        }
+        if not self.fixtures:
+            self.fixtures["synthetic"] = synthetic_payload()
+        self._rotation = cycle(list(self.fixtures))
+        self.stats = {"requests": 0, "errors": 0}
+
+    def respond(self, query: Dict[str, str]):
+        """Returns (status, payload) for one Journey query."""
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.options.latency_ms + self.random.uniform(-1, 1) * self.options.jitter_ms
+            failed = self.random.random() < self.options.error_rate
+            if failed:
+                self.stats["errors"] += 1
+            key = f"{query.get('fromPointId')}_{query.get('toPointId')}"
+            name = key if key in self.fixtures else next(self._rotation)
+            payload = json.loads(json.dumps(self.fixtures[name]))
+            self._apply_deviations(payload)
+
+        time.sleep(max(delay, 0.0) / 1000)
+        if failed:
+            return 503, {"message": "Service Unavailable"}
+        if self.options.rebase_minutes is not None:
+            self._rebase_times(payload)
+        return 200, payload
+
+    def _apply_deviations(self, payload: dict) -> None:
+        for journey in payload.get("journeys", []):
+            if self.random.random() < self.options.cancel_rate:
+                journey["deviationTag"] = {"text": "INSTÄLLD"}
+            links = journey.get("routeLinks") or []
+            if links and self.random.random() < self.options.delay_rate:
+                links[0].setdefault("from", {})["deviation"] = self.random.randint(1, 15)
+
+    def _rebase_times(self, payload: dict) -> None:
+        """Shifts every route link time so the first departure is `rebase_minutes` from now."""
+        times = [link.get(side, {}).get("time", "")
+                 for journey in payload.get("journeys", [])
+                 for link in journey.get("routeLinks") or []
+                 for side in ("from", "to")]
+        parsed = [_parse(value) for value in times if _TIMESTAMP.match(value)]
+        if not parsed:
+            return
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        shift = now + timedelta(minutes=self.options.rebase_minutes) - min(parsed)
+        for journey in payload.get("journeys", []):
+            for link in journey.get("routeLinks") or []:
+                for side in ("from", "to"):
+                    point = link.get(side) or {}
+                    if _TIMESTAMP.match(point.get("time", "")):
+                        shifted = (_parse(point["time"]) + shift).astimezone(timezone.utc)
+                        point["time"] = shifted.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def make_handler(api: MockJourneyApi):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != JOURNEY_PATH:
+                self._send(404, {"message": "Not Found"})
+                return
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            self._send(*api.respond(query))
+
+        def _send(self, status: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug("mock_api: " + format, *args)
+
+    return Handler
+
+
+def start_server(options: MockOptions, host: str = "127.0.0.1", port: int = 0,
+                 fixture_dir: Path = FIXTURE_DIR):
+    """Starts the mock API on a background thread and returns (server, base_url)."""
+    api = MockJourneyApi(options, fixture_dir)
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    server.api = api
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURE_DIR)
+    parser.add_argument("--latency", type=float, default=0.0, help="base latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- latency jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--cancel-rate", type=float, default=0.0, help="share of journeys tagged INSTÄLLD")
+    parser.add_argument("--delay-rate", type=float, default=0.0, help="share of journeys given a deviation")
+    parser.add_argument("--no-rebase", action="store_true", help="serve recorded times unchanged")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    options = MockOptions(
+        latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate,
+        cancel_rate=args.cancel_rate, delay_rate=args.delay_rate,
+        rebase_minutes=None if args.no_rebase else MockOptions.rebase_minutes, seed=args.seed,
+    )
+    server, base_url = start_server(options, args.host, args.port, args.fixtures)
+    logging.info(f"Serving {len(server.api.fixtures)} fixture(s) on {base_url}{JOURNEY_PATH}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
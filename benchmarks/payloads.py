@@ -0,0 +1,77 @@
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from src.departure import Departure
+
+
+def synthetic_payload(journeys: int = 6, route_links: int = 3, geometry_points: int = 400,
+                      seed: int = 0) -> Dict:
+    """Builds a Journey response with the shape and bulk of a real /gw-tps/api/v2/Journey payload."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    result = {"journeys": []}
+    for j in range(journeys):
+        departure = start + timedelta(minutes=10 + 12 * j)
+        links = []
+        for k in range(route_links):
+            leg_departure = departure + timedelta(minutes=25 * k)
+            leg_arrival = leg_departure + timedelta(minutes=rng.randint(8, 24))
+            links.append({
+                "from": {
+                    "id": f"90210120800{k:05d}",
+                    "name": "Hyllie station",
+                    "time": leg_departure.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "pos": f"Spår {rng.randint(1, 4)}",
+                    "deviation": rng.choice([None, 0, 2, 5]),
+                    "coord": {"lat": 55.56 + rng.random() / 10, "lon": 12.97 + rng.random() / 10},
+                },
+                "to": {
+                    "id": f"90210120812{k:05d}",
+                    "name": "Lund C",
+                    "time": leg_arrival.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "pos": f"Spår {rng.randint(1, 4)}",
+                    "coord": {"lat": 55.70 + rng.random() / 10, "lon": 13.18 + rng.random() / 10},
+                },
+                "line": {"name": "Öresundståg", "number": str(1000 + j), "operator": "SJ Öresund",
+                         "transportMode": "TRAIN", "towards": "Kalmar C"},
+                "notes": [{"text": "Ingen ombordförsäljning", "type": "INFO"}] * rng.randint(0, 3),
+                "geometry": [[55.56 + i / 10000, 12.97 + i / 10000] for i in range(geometry_points)],
+            })
+        journey = {
+            "id": f"journey-{j}",
+            "sequenceNo": j,
+            "duration": rng.randint(10, 60),
+            "price": {"amount": 60.0, "currency": "SEK", "zones": [1, 2]},
+            "routeLinks": links,
+        }
+        if rng.random() < 0.15:
+            journey["deviationTag"] = {"text": "INSTÄLLD", "severity": "HIGH"}
+        result["journeys"].append(journey)
+    return result
+
+
+def load_payloads(paths: List[str]) -> Dict[str, bytes]:
+    """Reads recorded payloads from disk, or falls back to a synthetic one."""
+    if not paths:
+        return {"synthetic": json.dumps(synthetic_payload()).encode("utf-8")}
+    return {Path(path).name: Path(path).read_bytes() for path in paths}
+
+
+def sample_departures(count: int = 5, seed: int = 0) -> List[Departure]:
+    """Builds upcoming Departure records with a mix of delays and cancellations."""
+    rng = random.Random(seed)
+    now = int(time.time()) // 60 * 60
+    departures = []
+    for i in range(count):
+        departure = now + 600 + 720 * i
+        if rng.random() < 0.2:
+            departures.append(Departure(departure, None, cancelled=True))
+        else:
+            departures.append(Departure(departure, departure + rng.randint(8, 40) * 60,
+                                        delay=rng.choice([None, 0, 120, 300]),
+                                        track=str(rng.randint(1, 12))))
+    return departures
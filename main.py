@@ -9,8 +9,10 @@ import random
 from pathlib import Path
 
 from src.config import AppConfig
+from src.frame_diff import FrameDiff, NO_CHANGE, FULL
 from src.journey_display import JourneyDisplay
-from PIL import Image,ImageDraw
+from src.lib.waveshare_epd import epdconfig
+from PIL import Image
 from src.time_manager import TimeManager
 
 class DisplayController:
@@ -25,10 +27,12 @@ class DisplayController:
         self.last_full_refresh = None
         self.next_full_refresh_time = None
         self.time_manger = TimeManager()
+        self.frame_diff = FrameDiff(self.config.display.width, self.config.display.height)
 
     def cleanup(self):
         """Cleanup resources before shutdown."""
         logging.info("Cleaning up...")
+        self.frame_diff.reset()
         self.journey_display.cleanup()
 
     def get_current_mode(self) -> str:
@@ -58,22 +62,29 @@ class DisplayController:
     def initialize_journey_display(self):
         """Initialize the display with full content for the first time."""
         try:
-            self.journey_display.epd.init_fast()
-            self.base_image = self.journey_display.display_manager.create_base_image()
+            results = self.journey_display.latest_journeys()
+            self.base_image = self.journey_display.display_manager.create_base_image(list(results))
             # Draw initial journey information
             section_width = self.config.display.width // len(self.journey_display.journey_planners)
-            for i, (name, planner) in enumerate(self.journey_display.journey_planners.items()):
-                journey_times = planner.get_journey_times()
+            for i, (name, journey_times) in enumerate(results.items()):
+                if journey_times is None:
+                    continue
                 start_x = i * section_width
-                self.journey_display.display_manager.draw_journey_section(
+                self.journey_display.display_manager.draw_journey_rows(
                     image=self.base_image,
                     journeys=journey_times,
-                    title=name,
                     start_x=start_x,
                     section_width=section_width
                 )
-            # Display the full image
-            self.journey_display.epd.display(self.journey_display.epd.getbuffer(self.base_image))
+            self.journey_display.display_manager.reset_dirty()
+            buffer = self.journey_display.epd.getbuffer(self.base_image)
+            # Display the full image; unchanged frames are only skipped on the clock tick path
+            epdconfig.busy_waits.clear()
+            self.journey_display.epd.init_fast()
+            self.journey_display.epd.display(buffer)
+            self.frame_diff.commit(buffer)
+            logging.info(f"Full refresh waited {sum(epdconfig.busy_waits):.2f} s on the panel")
+            self.journey_display.log_fetch_stats()
             time.sleep(2)  # Wait for the display to settle
             # Initialize partial mode
             self.journey_display.epd.init_part()
@@ -88,24 +99,36 @@ class DisplayController:
                 self.initialize_journey_display()
                 return
 
-            # Create ImageDraw object for the existing base image
-            draw = ImageDraw.Draw(self.base_image)
+            display_manager = self.journey_display.display_manager
+            epd = self.journey_display.epd
             
             # Clear the time area with white rectangle
             time_x, time_y = 10, 10
             time_width, time_height = 200, 60
-            draw.rectangle((time_x, time_y, time_x + time_width, time_y + time_height), fill=255)
+            display_manager.clear_region(self.base_image,
+                                         (time_x, time_y, time_x + time_width, time_y + time_height))
             
             # Draw new time
-            current_time = self.journey_display.display_manager.time_manager.get_current_time()
-            draw.text((time_x, time_y), current_time, 
-                     font=self.journey_display.display_manager.fonts['large'], fill=0)
+            current_time = display_manager.time_manager.get_current_time()
+            display_manager.draw_text(self.base_image, (time_x, time_y), current_time, 'large')
             
-            # Perform partial update
-            self.journey_display.epd.display_Partial(
-                self.journey_display.epd.getbuffer(self.base_image),
-                0, 0, self.journey_display.epd.width, self.journey_display.epd.height
-            )
+            # Perform partial update of the regions that actually changed
+            buffer = epd.getbuffer(self.base_image)
+            change, regions = self.frame_diff.compare(buffer, display_manager.take_dirty_windows())
+            if change == NO_CHANGE:
+                logging.debug("Clock unchanged, skipping panel refresh")
+                return
+            if change == FULL:
+                self.initialize_journey_display()
+                return
+            spi_bytes = 0
+            epdconfig.busy_waits.clear()
+            for x0, y0, x1, y1 in regions:
+                epd.display_region(buffer, x0, y0, x1 - x0, y1 - y0)
+                spi_bytes += (x1 - x0) // 8 * (y1 - y0)
+            self.frame_diff.commit(buffer)
+            logging.info(f"Partial refresh pushed {spi_bytes} bytes in {len(regions)} window(s), "
+                         f"waited {sum(epdconfig.busy_waits):.2f} s on the panel")
         except Exception as e:
             logging.error(f"Error updating time display: {e}")
             raise
@@ -123,7 +146,8 @@ class DisplayController:
         )
 
         if needs_full_refresh:
-            # Perform full refresh
+            # Perform full refresh; it clears partial-update ghosting, so it runs even if the frame is unchanged
+            self.frame_diff.reset()
             self.initialize_journey_display()
             self.last_full_refresh = current_time
         else:
@@ -213,6 +237,9 @@ class DisplayController:
         """Update display based on current mode."""
         current_mode = self.get_current_mode()
         logging.info(f"Current display mode: {current_mode}")
+        if current_mode != "journey":
+            self.journey_display.stop_refreshing()
+            self.frame_diff.reset()
         
         if current_mode == "shutdown":
             self.display_shutdown()
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 import logging
+import os
 
 @dataclass
 class DisplayConfig:
@@ -8,6 +9,11 @@ class DisplayConfig:
     height: int
     font_path: str
     font_sizes: Dict[str, int] = None
+    text_cache_size: int = 256
+    # SPI clock for this panel; None keeps EPD_SPI_HZ or the 4 MHz default
+    spi_speed_hz: Optional[int] = None
+    # Seconds a refresh may hold BUSY; None keeps EPD_BUSY_TIMEOUT or the 60 s default
+    busy_timeout_s: Optional[float] = None
 
     def __post_init__(self):
         if self.font_sizes is None:
@@ -18,6 +24,23 @@ class DisplayConfig:
                 "large": 42
             }
 
+@dataclass
+class HttpConfig:
+    base_url: str = field(default_factory=lambda: os.environ.get(
+        "SKANETRAFIKEN_BASE_URL", "https://www.skanetrafiken.se"))
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+    pool_maxsize: int = 6
+    max_retries: int = 1
+    fetch_deadline: float = 15.0
+    refresh_interval: float = 30.0
+
+@dataclass
+class CacheConfig:
+    ttl: float = 60.0
+    stale_ttl: float = 600.0
+    max_entries: int = 32
+
 @dataclass
 class JourneyConfig:
     from_point_id: str
@@ -30,8 +53,11 @@ class AppConfig:
         self.display = DisplayConfig(
             width=800,
             height=480,
-            font_path='/home/pi/project/src/font/inter.ttf'
+            font_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'font', 'inter.ttf')
         )
+
+        self.http = HttpConfig()
+        self.cache = CacheConfig()
         
         self.journeys = [
             JourneyConfig("9021012080040000", "9021012081216000", "Hyllie → Lund"),
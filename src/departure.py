@@ -0,0 +1,27 @@
+from typing import Optional
+
+
+class Departure:
+    """Compact record of one journey, built once when the API response is parsed.
+
+    Times are epoch seconds, `delay` is the departure deviation in seconds and
+    `track` is the bare track label (e.g. "2" for "Spår 2").
+    """
+    __slots__ = ("departure", "arrival", "delay", "cancelled", "track")
+
+    def __init__(self, departure: int, arrival: Optional[int], delay: Optional[int] = None,
+                 cancelled: bool = False, track: str = ""):
+        self.departure = departure
+        self.arrival = arrival
+        self.delay = delay
+        self.cancelled = cancelled
+        self.track = track
+
+    def __eq__(self, other):
+        if not isinstance(other, Departure):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Departure({fields})"
@@ -1,8 +1,11 @@
 from PIL import Image, ImageDraw, ImageFont, ImageOps
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import logging
+from src.departure import Departure
 from src.time_manager import TimeManager
 from src.config import DisplayConfig
+from src.font_registry import font_registry
+from src.text_cache import TextRunCache
 
 class DisplayManager:
     def __init__(self, epd, config: DisplayConfig):
@@ -10,6 +13,9 @@ class DisplayManager:
         self.config = config
         self.fonts = self._initialize_fonts()
         self.time_manager = TimeManager()
+        self._layout_templates: Dict[tuple, Image.Image] = {}
+        self.text_cache = TextRunCache(config.text_cache_size) if config.text_cache_size > 0 else None
+        self._dirty_boxes: List[Tuple[int, int, int, int]] = []
 
     def create_time_image(self) -> Image.Image:
         """Create an image containing only the current time."""
@@ -23,37 +29,107 @@ class DisplayManager:
         
     def _initialize_fonts(self) -> Dict[str, ImageFont.FreeTypeFont]:
         return {
-            size_name: ImageFont.truetype(self.config.font_path, size) 
+            size_name: font_registry.get(self.config.font_path, size) 
             for size_name, size in self.config.font_sizes.items()
         }
     
-    def create_base_image(self) -> Image.Image:
-        """Create a new base image with initial layout."""
-        image = Image.new('1', (self.config.width, self.config.height), 255)
-        draw = ImageDraw.Draw(image)
-        
-        # Draw vertical division line
-        draw.line((self.config.width//2, 0, self.config.width//2, self.config.height), fill=0)
-        
-        # Draw header line
-        draw.line((0, 60, self.config.width, 60), fill=0)
+    def draw_text(self, image: Image.Image, xy, text: str, font_name: str, fill: int = 0):
+        """Draw text through the text-run cache when enabled and return the box it covers."""
+        font = self.fonts[font_name]
+        if self.text_cache is not None:
+            box = self.text_cache.draw(image, xy, text, font, fill)
+        else:
+            ImageDraw.Draw(image).text(xy, text, font=font, fill=fill)
+            left, top, right, bottom = font_registry.textbbox(font, text, mode='1')
+            box = (xy[0] + left, xy[1] + top, xy[0] + right, xy[1] + bottom)
+        self.mark_dirty(box)
+        return box
+
+    def clear_region(self, image: Image.Image, box: Tuple[int, int, int, int]) -> None:
+        """Fill the inclusive box (x0, y0, x1, y1) with white and mark it dirty."""
+        ImageDraw.Draw(image).rectangle(box, fill=255)
+        self.mark_dirty((box[0], box[1], box[2] + 1, box[3] + 1))
+
+    def mark_dirty(self, box: Tuple[int, int, int, int]) -> None:
+        """Record that the half-open box (x0, y0, x1, y1) changed since the last refresh."""
+        self._dirty_boxes.append(box)
+
+    def reset_dirty(self) -> None:
+        """Forget the dirty boxes, e.g. after the whole frame was sent to the panel."""
+        self._dirty_boxes = []
+
+    def take_dirty_windows(self) -> List[Tuple[int, int, int, int]]:
+        """Return the dirty boxes merged into byte-aligned, non-overlapping windows and reset them.
+
+        Windows are half-open (x0, y0, x1, y1) with x0 and x1 multiples of 8,
+        clipped to the panel.
+        """
+        windows = []
+        for x0, y0, x1, y1 in self._dirty_boxes:
+            x0 = max(x0, 0) // 8 * 8
+            x1 = min((x1 + 7) // 8 * 8, self.config.width)
+            y0, y1 = max(y0, 0), min(y1, self.config.height)
+            if x0 < x1 and y0 < y1:
+                windows.append((x0, y0, x1, y1))
+        self._dirty_boxes = []
+
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(windows)):
+                for j in range(i + 1, len(windows)):
+                    a, b = windows[i], windows[j]
+                    if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                        windows[i] = (min(a[0], b[0]), min(a[1], b[1]),
+                                      max(a[2], b[2]), max(a[3], b[3]))
+                        del windows[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return windows
+
+    def create_base_image(self, titles: List[str] = ()) -> Image.Image:
+        """Create a new base image from the cached layout template and draw the current time."""
+        image = self.get_layout_template(titles).copy()
+        self.reset_dirty()
         
         # Draw current time in Sweden timezone
-        draw.text((10, 10), self.time_manager.get_current_time(), font=self.fonts['large'], fill=0)
+        self.draw_text(image, (10, 10), self.time_manager.get_current_time(), 'large')
         
         return image
 
-    def draw_journey_section(self, image: Image.Image, journeys: List[Dict], 
-                           title: str, start_x: int, section_width: int,
-                           spacing: int = 50) -> None:
-        """Draw a section of journey information with columns."""
-        draw = ImageDraw.Draw(image)
-        
-        title_y = 70+20
-        headers_y = 150
-        content_start_y = 180
+    def get_layout_template(self, titles: List[str] = ()) -> Image.Image:
+        """Return the static layout for the given section titles, rendered once and cached.
+
+        With titles, the template holds a section divider, title, column headers
+        and header rule per section; without, only the centre divider.
+        """
+        key = tuple(titles)
+        template = self._layout_templates.get(key)
+        if template is None:
+            template = Image.new('1', (self.config.width, self.config.height), 255)
+            draw = ImageDraw.Draw(template)
+
+            # Draw vertical division lines
+            if key:
+                section_width = self.config.width // len(key)
+                for i in range(1, len(key)):
+                    draw.line((i * section_width, 0, i * section_width, self.config.height), fill=0)
+            else:
+                draw.line((self.config.width//2, 0, self.config.width//2, self.config.height), fill=0)
+
+            # Draw header line
+            draw.line((0, 60, self.config.width, 60), fill=0)
+
+            for i, title in enumerate(key):
+                self._draw_section_static(draw, title, i * section_width, section_width)
+
+            self._layout_templates[key] = template
+        return template
+
+    def _section_columns(self, start_x: int, section_width: int):
         column_padding = 10
-        
         symbol_width = 30
         content_start_x = start_x + column_padding + symbol_width
         remaining_width = section_width - (2 * column_padding) - symbol_width
@@ -62,8 +138,16 @@ class DisplayManager:
         departure_x = content_start_x
         arrival_x = departure_x + column_width
         track_x = arrival_x + column_width
+        return start_x + column_padding, departure_x, arrival_x, track_x
+
+    def _draw_section_static(self, draw: ImageDraw.ImageDraw, title: str,
+                             start_x: int, section_width: int) -> None:
+        title_y = 70+20
+        headers_y = 150
+        _, departure_x, arrival_x, track_x = self._section_columns(start_x, section_width)
         
-        title_x = start_x + (section_width - len(title)*18) // 2
+        title_width = font_registry.textlength(self.fonts['medium_large'], title)
+        title_x = start_x + int(section_width - title_width) // 2
         draw.text((title_x, title_y), title, font=self.fonts['medium_large'], fill=0)
         
         draw.text((departure_x, headers_y), "Departure", font=self.fonts['small'], fill=0)
@@ -72,28 +156,41 @@ class DisplayManager:
         
         draw.line((start_x + 5, headers_y + 25, 
                   start_x + section_width - 5, headers_y + 25), fill=0)
+
+    def draw_journey_section(self, image: Image.Image, journeys: List[Departure], 
+                           title: str, start_x: int, section_width: int,
+                           spacing: int = 50) -> None:
+        """Draw a section of journey information with columns."""
+        self._draw_section_static(ImageDraw.Draw(image), title, start_x, section_width)
+        self.draw_journey_rows(image, journeys, start_x, section_width, spacing)
+
+    def draw_journey_rows(self, image: Image.Image, journeys: List[Departure],
+                          start_x: int, section_width: int, spacing: int = 50) -> None:
+        """Draw only the departure rows of a section onto a layout template copy."""
+        content_start_y = 180
+        symbol_x, departure_x, arrival_x, track_x = self._section_columns(start_x, section_width)
         
         # Draw journey entries
         for i, entry in enumerate(journeys[:5]):
             y_pos = content_start_y + (spacing * i)
             
-            symbol_x = start_x + column_padding
-            if entry.get('cancelled'):
-                draw.text((symbol_x, y_pos), "×", font=self.fonts['medium'], fill=0)
-            elif entry.get('delay'):
-                draw.text((symbol_x, y_pos), "!", font=self.fonts['medium'], fill=0)
+            if entry.cancelled:
+                self.draw_text(image, (symbol_x, y_pos), "×", 'medium')
+            elif entry.delay:
+                self.draw_text(image, (symbol_x, y_pos), "!", 'medium')
             
             # Draw times using the same x positions as headers
-            draw.text((departure_x, y_pos), entry['departure'], 
-                     font=self.fonts['medium'], fill=0)
-            draw.text((arrival_x, y_pos), entry['arrival'], 
-                     font=self.fonts['medium'], fill=0)
-            if entry['track'] != "Cancelled":
-                draw.text((track_x, y_pos), entry['track'].split(" ")[-1], 
-                         font=self.fonts['medium'], fill=0)
-            if entry.get('delay'):
-                draw.text((departure_x + 85, y_pos - 8), 
-                         "+"+str(entry['delay']), font=self.fonts['small'], fill=0)
+            self.draw_text(image, (departure_x, y_pos), 
+                           self.time_manager.format_time(entry.departure), 'medium')
+            if entry.cancelled:
+                self.draw_text(image, (arrival_x, y_pos), "Cancelled", 'medium')
+            else:
+                self.draw_text(image, (arrival_x, y_pos), 
+                               self.time_manager.format_time(entry.arrival), 'medium')
+                self.draw_text(image, (track_x, y_pos), entry.track, 'medium')
+            if entry.delay:
+                self.draw_text(image, (departure_x + 85, y_pos - 8), 
+                               "+"+str(entry.delay // 60), 'small')
 
     def update_display(self, image: Image.Image) -> None:
         """Update the EPD display with the given image."""
@@ -0,0 +1,51 @@
+import threading
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from PIL import ImageFont
+
+
+class FontRegistry:
+    """Process-wide cache of loaded font faces and their text measurements."""
+
+    def __init__(self):
+        self._fonts: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, size: int) -> ImageFont.FreeTypeFont:
+        """Return the face at `path` in `size` points, loading it on first use."""
+        key = (path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            with self._lock:
+                font = self._fonts.get(key)
+                if font is None:
+                    font = self._fonts[key] = ImageFont.truetype(path, size)
+        return font
+
+    def textbbox(self, font: ImageFont.FreeTypeFont, text: str, mode: str = '') -> Tuple[int, int, int, int]:
+        """Bounding box of `text` drawn at the origin, as ImageDraw.textbbox would report it."""
+        return self._textbbox(font.path, font.size, text, mode)
+
+    def textlength(self, font: ImageFont.FreeTypeFont, text: str) -> float:
+        """Advance width of `text`, as ImageDraw.textlength would report it."""
+        return self._textlength(font.path, font.size, text)
+
+    @lru_cache(maxsize=1024)
+    def _textbbox(self, path: str, size: int, text: str, mode: str) -> Tuple[int, int, int, int]:
+        return self.get(path, size).getbbox(text, mode=mode)
+
+    @lru_cache(maxsize=1024)
+    def _textlength(self, path: str, size: int, text: str) -> float:
+        return self.get(path, size).getlength(text)
+
+    def stats(self) -> Dict[str, int]:
+        bbox, length = self._textbbox.cache_info(), self._textlength.cache_info()
+        return {
+            "fonts": len(self._fonts),
+            "metric_hits": bbox.hits + length.hits,
+            "metric_misses": bbox.misses + length.misses,
+        }
+
+
+font_registry = FontRegistry()
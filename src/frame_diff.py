@@ -0,0 +1,76 @@
+from typing import List, Optional, Tuple
+
+NO_CHANGE = "none"
+PARTIAL = "partial"
+FULL = "full"
+
+
+class FrameDiff:
+    """Compares packed 1bpp frames with the last frame sent to the panel."""
+
+    def __init__(self, width: int, height: int, full_threshold: float = 0.5):
+        self.stride = width // 8
+        self.height = height
+        self.full_threshold = full_threshold
+        self.last: Optional[bytes] = None
+
+    def compare(self, buffer, windows: List[Tuple[int, int, int, int]] = None
+                ) -> Tuple[str, Optional[List[Tuple[int, int, int, int]]]]:
+        """Return (NO_CHANGE, []), (PARTIAL, regions) or (FULL, None).
+
+        Regions are half-open (x0, y0, x1, y1) boxes with byte-aligned x edges.
+        When `windows` is given, only the rows they cover are compared and the
+        changes inside each window are merged into one box, so every window
+        costs at most one panel refresh.
+        """
+        if self.last is None or len(self.last) != len(buffer):
+            return FULL, None
+
+        if windows is None:
+            rows = range(self.height)
+        else:
+            rows = sorted({y for _, y0, _, y1 in windows for y in range(y0, y1)})
+
+        stride = self.stride
+        last = memoryview(self.last)
+        new = memoryview(buffer)
+        regions = []
+        band = None
+        for y in rows:
+            start = y * stride
+            old_row, new_row = last[start:start + stride], new[start:start + stride]
+            if old_row == new_row:
+                band = None
+                continue
+            diff = int.from_bytes(old_row, 'big') ^ int.from_bytes(new_row, 'big')
+            first = stride - 1 - (diff.bit_length() - 1) // 8
+            last_byte = stride - 1 - ((diff & -diff).bit_length() - 1) // 8
+            if band is not None and band[3] == y:
+                band[0], band[2], band[3] = min(band[0], first), max(band[2], last_byte + 1), y + 1
+            else:
+                band = [first, y, last_byte + 1, y + 1]
+                regions.append(band)
+
+        if not regions:
+            return NO_CHANGE, []
+        if windows is not None:
+            boxes = {}
+            for band in regions:
+                window = next(i for i, (_, y0, _, y1) in enumerate(windows) if y0 < band[3] and band[1] < y1)
+                box = boxes.get(window)
+                boxes[window] = band if box is None else [min(box[0], band[0]), min(box[1], band[1]),
+                                                          max(box[2], band[2]), max(box[3], band[3])]
+            regions = sorted(boxes.values(), key=lambda box: box[1])
+        regions = [(x0 * 8, y0, x1 * 8, y1) for x0, y0, x1, y1 in regions]
+        changed_bytes = sum((x1 - x0) // 8 * (y1 - y0) for x0, y0, x1, y1 in regions)
+        if changed_bytes > self.full_threshold * stride * self.height:
+            return FULL, None
+        return PARTIAL, regions
+
+    def commit(self, buffer) -> None:
+        """Remember `buffer` as what the panel now shows."""
+        self.last = bytes(buffer)
+
+    def reset(self) -> None:
+        """Forget the panel contents, forcing the next comparison to report FULL."""
+        self.last = None
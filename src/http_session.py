@@ -0,0 +1,67 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import HttpConfig
+
+
+class HttpSession:
+    """Pooled keep-alive HTTP session shared by all journey planners."""
+
+    def __init__(self, config: Optional[HttpConfig] = None):
+        self.config = config or HttpConfig()
+        self.timeout = (self.config.connect_timeout, self.config.read_timeout)
+        self._lock = threading.Lock()
+        self._requests_sent = 0
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config.pool_maxsize,
+            pool_block=False,
+            max_retries=self.config.max_retries,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update({
+            "accept-encoding": "gzip, deflate",
+            "connection": "keep-alive",
+        })
+
+    def get(self, url: str, params: Dict = None, headers: Dict = None,
+            stream: bool = False) -> requests.Response:
+        """Send a GET request over the pooled session with the configured timeouts."""
+        with self._lock:
+            self._requests_sent += 1
+        return self.session.get(url, params=params, headers=headers,
+                                timeout=self.timeout, stream=stream)
+
+    def stats(self) -> Dict[str, int]:
+        """Return connection counters, summed over the live connection pools."""
+        new_connections = 0
+        pooled_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            pooled_requests += pool.num_requests
+        return {
+            "requests": self._requests_sent,
+            "new_connections": new_connections,
+            "reused_connections": max(pooled_requests - new_connections, 0),
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logging.info(
+            f"HTTP session: {stats['requests']} requests, "
+            f"{stats['new_connections']} new connections, "
+            f"{stats['reused_connections']} reused"
+        )
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,85 @@
+import json
+from typing import BinaryIO, Dict, List
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_JOURNEY = "journeys.item"
+_ROUTE_LINK = "journeys.item.routeLinks.item"
+_DEVIATION_TAG = "journeys.item.deviationTag"
+
+# Leaf paths of the first route link that get_route_status reads, mapped to (side, field).
+_ROUTE_LINK_FIELDS = {
+    "journeys.item.routeLinks.item.from.time": ("from", "time"),
+    "journeys.item.routeLinks.item.from.pos": ("from", "pos"),
+    "journeys.item.routeLinks.item.from.deviation": ("from", "deviation"),
+    "journeys.item.routeLinks.item.to.time": ("to", "time"),
+}
+_SCALAR_EVENTS = {"string", "number", "boolean", "null"}
+# Small reads keep the batch of parser events produced per chunk small.
+_READ_SIZE = 4096
+
+
+def decode_journeys(stream: BinaryIO) -> List[Dict]:
+    """Decodes a Journey response into slim journey dicts.
+
+    Only the first route link's from/to times, track and deviation plus the
+    deviation tag text are kept, in the same shape as the API response, so
+    the result can be fed to JourneyPlanner.get_route_status unchanged.
+    Uses the streaming ijson parser when it is installed.
+    """
+    if ijson is None:
+        return slim_journeys(json.load(stream))
+    return list(_iter_journeys(stream))
+
+
+def slim_journeys(data: Dict) -> List[Dict]:
+    """Reduces an already decoded Journey response to the fields decode_journeys keeps."""
+    journeys = []
+    for route in data.get("journeys", []):
+        journey = {"routeLinks": []}
+        route_links = route.get("routeLinks") or []
+        if route_links:
+            link = {}
+            for side, field in _ROUTE_LINK_FIELDS.values():
+                source = route_links[0].get(side)
+                if isinstance(source, dict) and field in source:
+                    link.setdefault(side, {})[field] = source[field]
+            journey["routeLinks"].append(link)
+        tag = route.get("deviationTag")
+        if isinstance(tag, dict):
+            journey["deviationTag"] = {"text": tag["text"]} if "text" in tag else {}
+        journeys.append(journey)
+    return journeys
+
+
+def _iter_journeys(stream: BinaryIO):
+    journey = None
+    link = None
+    link_index = -1
+    for prefix, event, value in ijson.parse(stream, buf_size=_READ_SIZE, use_float=True):
+        if prefix == _JOURNEY:
+            if event == "start_map":
+                journey = {"routeLinks": []}
+                link_index = -1
+            elif event == "end_map":
+                yield journey
+                journey = None
+        elif prefix == _ROUTE_LINK:
+            if event == "start_map":
+                link_index += 1
+                if link_index == 0:
+                    link = {}
+                    journey["routeLinks"].append(link)
+        elif prefix == _DEVIATION_TAG:
+            if event == "start_map":
+                journey["deviationTag"] = {}
+        elif prefix == _DEVIATION_TAG + ".text":
+            if event in _SCALAR_EVENTS:
+                journey["deviationTag"]["text"] = value
+        elif link_index == 0 and prefix in _ROUTE_LINK_FIELDS:
+            if event in _SCALAR_EVENTS:
+                side, field = _ROUTE_LINK_FIELDS[prefix]
+                link.setdefault(side, {})[field] = value
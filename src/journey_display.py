@@ -1,6 +1,11 @@
 import logging
-from src.lib.waveshare_epd import epd7in5_V2
+from src.lib.waveshare_epd import epd7in5_V2, epdconfig
 from src.skanetrafiken import JourneyPlanner
+from src.http_session import HttpSession
+from src.journey_fetcher import JourneyFetcher
+from src.journey_refresher import JourneyRefresher
+from src.response_cache import ResponseCache
+from src.request_coalescer import default_coalescer
 import time
 
 from src.display_config import DisplayManager
@@ -11,45 +16,84 @@ class JourneyDisplay:
         self.config = config
         self.epd = self._initialize_epd()
         self.display_manager = DisplayManager(self.epd, config.display)
+        self.http_session = HttpSession(config.http)
+        self.response_cache = ResponseCache(config.cache)
         self.journey_planners = self._initialize_journey_planners()
+        self.fetcher = JourneyFetcher(self.journey_planners, config.http.fetch_deadline)
+        self.refresher = JourneyRefresher(self.fetcher, config.http.refresh_interval)
 
     def _initialize_epd(self):
         epd = epd7in5_V2.EPD()
+        if self.config.display.spi_speed_hz:
+            epdconfig.set_spi_speed(self.config.display.spi_speed_hz)
+        if self.config.display.busy_timeout_s:
+            epdconfig.set_busy_timeout(self.config.display.busy_timeout_s)
         epd.init()
         epd.Clear()
         return epd
 
     def _initialize_journey_planners(self):
         return {
-            config.display_name: JourneyPlanner(config.from_point_id, config.to_point_id)
+            config.display_name: JourneyPlanner(config.from_point_id, config.to_point_id,
+                                                session=self.http_session,
+                                                cache=self.response_cache)
             for config in self.config.journeys
         }
 
+    def start_refreshing(self):
+        """Start fetching journeys in the background."""
+        self.refresher.start()
+
+    def stop_refreshing(self):
+        """Stop the background journey fetching."""
+        self.refresher.stop()
+
+    def latest_journeys(self):
+        """Return the upcoming departures per route from the latest background snapshot.
+
+        Only the very first call waits (up to the fetch deadline) for data;
+        routes without data map to None.
+        """
+        self.start_refreshing()
+        snapshot = self.refresher.snapshot(timeout=self.config.http.fetch_deadline)
+        if snapshot is None:
+            return {name: None for name in self.journey_planners}
+        return {
+            name: None if journeys is None
+            else self.journey_planners[name].filter_upcoming_journeys(journeys)
+            for name, journeys in snapshot.routes
+        }
+
+    def log_fetch_stats(self):
+        """Log connection reuse and response cache statistics."""
+        self.http_session.log_stats()
+        logging.info(f"Response cache: {self.response_cache.stats()}")
+        logging.info(f"Request coalescing: {default_coalescer.stats()}")
+
     def update_display(self):
         """Update the display with current journey information."""
         try:
+            results = self.latest_journeys()
             self.epd.init_fast()
-            image = self.display_manager.create_base_image()
+            image = self.display_manager.create_base_image(list(results))
             
             # Calculate section width based on number of journey planners
             section_width = self.config.display.width // len(self.journey_planners)
             
             # Draw journey sections
-            for i, (name, planner) in enumerate(self.journey_planners.items()):
-                try:
-                    journey_times = planner.get_journey_times()
-                    start_x = i * section_width
-                    self.display_manager.draw_journey_section(
-                        image=image,
-                        journeys=journey_times,
-                        title=name,
-                        start_x=start_x,
-                        section_width=section_width
-                    )
-                except Exception as e:
-                    logging.error(f"Error fetching journey times for {name}: {e}")
+            for i, (name, journey_times) in enumerate(results.items()):
+                if journey_times is None:
+                    continue
+                start_x = i * section_width
+                self.display_manager.draw_journey_rows(
+                    image=image,
+                    journeys=journey_times,
+                    start_x=start_x,
+                    section_width=section_width
+                )
             
             self.display_manager.update_display(image)
+            self.log_fetch_stats()
             
         except Exception as e:
             logging.error(f"Error updating display: {e}")
@@ -57,6 +101,8 @@ class JourneyDisplay:
 
     def cleanup(self):
         """Clean up resources and put display to sleep."""
+        self.stop_refreshing()
+        self.fetcher.shutdown()
         try:
             self.epd.init()
             self.epd.Clear()
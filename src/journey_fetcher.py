@@ -0,0 +1,53 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from src.skanetrafiken import JourneyPlanner
+
+
+class JourneyFetcher:
+    """Fetches all configured routes concurrently under one overall deadline."""
+
+    def __init__(self, planners: Dict[str, JourneyPlanner], deadline: float):
+        self.planners = planners
+        self.deadline = deadline
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def fetch_all(self) -> Dict[str, Optional[List]]:
+        """Return journey times per route name.
+
+        Routes that failed or did not answer before the deadline map to None.
+        """
+        started = time.monotonic()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=max(len(self.planners), 1),
+                thread_name_prefix="journey-fetch"
+            )
+        futures = {
+            self.executor.submit(planner.get_journey_times): name
+            for name, planner in self.planners.items()
+        }
+        done, not_done = wait(futures, timeout=self.deadline)
+
+        results = {}
+        for future, name in futures.items():
+            if future in not_done:
+                logging.error(f"Journey fetch for {name} missed the {self.deadline}s deadline")
+                results[name] = None
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching journey times for {name}: {e}")
+                results[name] = None
+
+        logging.info(f"Fetched {len(done)}/{len(futures)} routes in {time.monotonic() - started:.2f}s")
+        return results
+
+    def shutdown(self) -> None:
+        """Release the worker threads; the next fetch_all starts new ones."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from src.departure import Departure
+from src.journey_fetcher import JourneyFetcher
+
+
+@dataclass(frozen=True)
+class JourneySnapshot:
+    """Immutable view of the latest departures for every route, in configuration order."""
+    routes: Tuple[Tuple[str, Optional[Tuple[Departure, ...]]], ...]
+    fetched_at: float
+
+    def as_dict(self) -> Dict[str, Optional[Tuple[Departure, ...]]]:
+        return dict(self.routes)
+
+
+class JourneyRefresher:
+    """Keeps a JourneySnapshot up to date from a background thread."""
+
+    def __init__(self, fetcher: JourneyFetcher, interval: float):
+        self.fetcher = fetcher
+        self.interval = interval
+        self._snapshot: Optional[JourneySnapshot] = None
+        self._updated = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="journey-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.fetcher.deadline + 1)
+            self._thread = None
+
+    def snapshot(self, timeout: float = 0) -> Optional[JourneySnapshot]:
+        """Return the latest snapshot, waiting up to `timeout` seconds for the first one."""
+        with self._updated:
+            if self._snapshot is None and timeout > 0:
+                self._updated.wait_for(lambda: self._snapshot is not None, timeout=timeout)
+            return self._snapshot
+
+    def refresh(self) -> JourneySnapshot:
+        """Fetch every route once and publish a new snapshot.
+
+        Routes that fail keep their departures from the previous snapshot.
+        """
+        previous = self._snapshot.as_dict() if self._snapshot else {}
+        results = self.fetcher.fetch_all()
+        routes = tuple(
+            (name, tuple(journeys) if journeys is not None else previous.get(name))
+            for name, journeys in results.items()
+        )
+        snapshot = JourneySnapshot(routes=routes, fetched_at=time.time())
+        with self._updated:
+            self._snapshot = snapshot
+            self._updated.notify_all()
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing journeys: {e}")
+            self._stop.wait(self.interval)
@@ -29,6 +29,7 @@
 
 import logging
 from . import epdconfig
+from . import packing
 
 # Display resolution
 EPD_WIDTH       = 200
@@ -121,8 +122,7 @@ class EPD:
         
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):
-            epdconfig.delay_ms(20)
+        epdconfig.wait_until_idle(0)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
@@ -251,31 +251,12 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x24)
-        self.send_data2([color] * self.height * linewidth)
+        self.send_data2(bytes([color]) * self.height * linewidth)
                 
         self.TurnOnDisplay()
         
     def getbuffer(self, image):
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return packing.pack_1bpp(image, self.width, self.height)
 
     def display(self, image):
         if (image == None):
@@ -301,11 +282,29 @@ class EPD:
         if (image == None):
             return
         
+        self.display_region(image, 0, 0, self.width, self.height)
+        
+    def display_region(self, buffer, x, y, w, h):
+        # Partial refresh of the byte-aligned window x, y, w, h (pixels) of a full frame buffer
+        linewidth = (self.width + 7) // 8
+        window = packing.byte_window(self.width, self.height, x, y, w, h)
+        if window is None:
+            return
+        x0, y0, x1, y1 = window
+
+        # Data entry mode 0x01 counts Y down, so frame row k is RAM row height-1-k
+        self.SetWindows(x0 * 8, self.height - 1 - y0, x1 * 8 - 1, self.height - y1)
+        self.SetCursor(x0, self.height - 1 - y0)
+
         self.send_command(0x24)
-        self.send_data2(image)
-                
+        self.send_data2(packing.crop_rows(buffer, linewidth, self.height, x0, y0, x1, y1))
+        if window != (0, 0, linewidth, self.height):
+            # display() and the other full-frame writes expect the whole RAM window
+            self.SetWindows(0, self.height - 1, self.width - 1, 0)
+            self.SetCursor(0, self.height - 1)
+
         self.TurnOnDisplayPart()
-        
+
     def sleep(self):
         self.send_command(0x10) # DEEP_SLEEP_MODE
         self.send_data(0x01)
@@ -30,6 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import packing
+from PIL import Image
 
 # Display resolution
 EPD_WIDTH       = 122
@@ -113,8 +115,7 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 1)
         
     def ReadBusy(self):
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)    
+        epdconfig.wait_until_idle(0)
 
     def TurnOnDisplay(self):
         self.send_command(0x22)
@@ -128,6 +129,26 @@ class EPD:
         self.send_command(0x20)        
         self.ReadBusy()
         
+    def SetWindow(self, x_start, y_start, x_end, y_end):
+        self.send_command(0x44) # set Ram-X address start/end position
+        # x point must be the multiple of 8 or the last 3 bits will be ignored
+        self.send_data((x_start>>3) & 0xFF)
+        self.send_data((x_end>>3) & 0xFF)
+
+        self.send_command(0x45) # set Ram-Y address start/end position
+        self.send_data(y_start & 0xFF)
+        self.send_data((y_start >> 8) & 0xFF)
+        self.send_data(y_end & 0xFF)
+        self.send_data((y_end >> 8) & 0xFF)
+
+    def SetCursor(self, x, y):
+        self.send_command(0x4E) # set RAM x address count, in bytes
+        self.send_data(x & 0xFF)
+
+        self.send_command(0x4F) # set RAM y address count
+        self.send_data(y & 0xFF)
+        self.send_data((y >> 8) & 0xFF)
+
     def init(self, update):
         if (epdconfig.module_init() != 0):
             return -1
@@ -219,33 +240,20 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        if self.width%8 == 0:
-            linewidth = int(self.width/8)
-        else:
-            linewidth = int(self.width/8) + 1
-         
-        buf = [0xFF] * (linewidth * self.height)
+        linewidth = (self.width + 7) // 8
         image_monocolor = image.convert('1')
         imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        
+
         if(imwidth == self.width and imheight == self.height):
             logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):                    
-                    if pixels[x, y] == 0:
-                        x = imwidth - x
-                        buf[int(x / 8) + y * linewidth] &= ~(0x80 >> (x % 8))
+            # Column x lands at imwidth - x, so the mirror starts one pixel in
+            canvas = Image.new('1', (linewidth * 8, self.height), 255)
+            canvas.paste(image_monocolor.transpose(Image.Transpose.FLIP_LEFT_RIGHT), (1, 0))
+            return bytearray(canvas.tobytes('raw'))
         elif(imwidth == self.height and imheight == self.width):
             logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        newy = imwidth - newy - 1
-                        buf[int(newx / 8) + newy*linewidth] &= ~(0x80 >> (y % 8))
-        return buf   
+            return packing.pack_rows(image_monocolor.transpose(Image.Transpose.TRANSPOSE))
+        return bytearray([0xFF]) * (linewidth * self.height)
         
         
     def display(self, image):
@@ -254,22 +262,30 @@ class EPD:
         self.TurnOnDisplay()
         
     def displayPartial(self, image):
-        if self.width%8 == 0:
-            linewidth = int(self.width/8)
-        else:
-            linewidth = int(self.width/8) + 1
+        self.display_region(image, 0, 0, self.width, self.height)
+
+    def display_region(self, buffer, x, y, w, h):
+        # Partial refresh of the byte-aligned window x, y, w, h (pixels) of a full frame buffer
+        linewidth = (self.width + 7) // 8
+        window = packing.byte_window(self.width, self.height, x, y, w, h)
+        if window is None:
+            return
+        x0, y0, x1, y1 = window
+        image = packing.crop_rows(buffer, linewidth, self.height, x0, y0, x1, y1)
 
-        buf = [0x00] * self.height * linewidth
-        for j in range(0, self.height):
-            for i in range(0, linewidth):
-                buf[i + j * linewidth] = ~image[i + j * linewidth]
+        # Data entry mode 0x01 counts Y down, so frame row k is RAM row height-1-k
+        self.SetWindow(x0 * 8, self.height - 1 - y0, x1 * 8 - 1, self.height - y1)
+        self.SetCursor(x0, self.height - 1 - y0)
 
         self.send_command(0x24)
-        self.send_data2(image)   
-                
-                
+        self.send_data2(image)
+
         self.send_command(0x26)
-        self.send_data2(buf)  
+        self.send_data2(packing.inverted(image))
+        if window != (0, 0, linewidth, self.height):
+            # display() and the other full-frame writes expect the whole RAM window
+            self.SetWindow(0, self.height - 1, linewidth * 8 - 1, 0)
+            self.SetCursor(0, self.height - 1)
         self.TurnOnDisplayPart()
 
     def displayPartBaseImage(self, image):
@@ -287,10 +303,7 @@ class EPD:
             linewidth = int(self.width/8) + 1
         # logger.debug(linewidth)
         
-        buf = [0x00] * self.height * linewidth
-        for j in range(0, self.height):
-            for i in range(0, linewidth):
-                buf[i + j * linewidth] = color
+        buf = bytes([color]) * (self.height * linewidth)
 
         self.send_command(0x24)
         self.send_data2(buf)
@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import packing
 
 # Display resolution
 EPD_WIDTH       = 122
@@ -137,8 +138,7 @@ class EPD:
     '''
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(10)  
+        epdconfig.wait_until_idle(0)
         logger.debug("e-Paper busy release")
 
     '''
@@ -271,20 +271,7 @@ class EPD:
         image : Image data
     '''
     def getbuffer(self, image):
-        img = image
-        imwidth, imheight = img.size
-        if(imwidth == self.width and imheight == self.height):
-            img = img.convert('1')
-        elif(imwidth == self.height and imheight == self.width):
-            # image has correct dimensions, but needs to be rotated
-            img = img.rotate(90, expand=True).convert('1')
-        else:
-            logger.warning("Wrong image dimensions: must be " + str(self.width) + "x" + str(self.height))
-            # return a blank buffer
-            return [0x00] * (int(self.width/8) * self.height)
-
-        buf = bytearray(img.tobytes('raw'))
-        return buf
+        return packing.pack_1bpp(image, self.width, self.height, blank=0x00, rotate_first=True)
         
     '''
     function : Sends the image buffer in RAM to e-Paper and displays
@@ -298,9 +285,7 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x24)
-        for j in range(0, self.height):
-            for i in range(0, linewidth):
-                self.send_data(image[i + j * linewidth])   
+        self.send_data2(image[:linewidth * self.height])
         self.TurnOnDisplay()
     
     '''
@@ -309,6 +294,21 @@ class EPD:
         image : Image data
     '''
     def displayPartial(self, image):
+        self.display_region(image, 0, 0, self.width, self.height)
+
+    '''
+    function : Writes only the byte-aligned window x, y, w, h (pixels) of a full
+               frame buffer to RAM and partial refreshes
+    parameter:
+        buffer : Image data of the whole frame
+    '''
+    def display_region(self, buffer, x, y, w, h):
+        linewidth = (self.width + 7) // 8
+        window = packing.byte_window(self.width, self.height, x, y, w, h)
+        if window is None:
+            return
+        x0, y0, x1, y1 = window
+
         epdconfig.digital_write(self.reset_pin, 0)
         epdconfig.delay_ms(1)
         epdconfig.digital_write(self.reset_pin, 1)  
@@ -334,14 +334,18 @@ class EPD:
         self.send_command(0x20)
         self.ReadBusy()
 
-        self.SetWindow(0, 0, self.width - 1, self.height - 1)
-        self.SetCursor(0, 0)
+        self.SetWindow(x0 * 8, y0, x1 * 8 - 1, y1 - 1)
+        self.SetCursor(x0, y0)
         
         self.send_command(0x24) # WRITE_RAM
         # for j in range(0, self.height):
         #     for i in range(0, linewidth):
         #         self.send_data(image[i + j * linewidth])   
-        self.send_data2(image)  
+        self.send_data2(packing.crop_rows(buffer, linewidth, self.height, x0, y0, x1, y1))
+        if window != (0, 0, linewidth, self.height):
+            # display() and the other full-frame writes expect the whole RAM window
+            self.SetWindow(0, 0, self.width-1, self.height-1)
+            self.SetCursor(0, 0)
         self.TurnOnDisplayPart()
 
     '''
@@ -369,7 +373,7 @@ class EPD:
         # logger.debug(linewidth)
         
         self.send_command(0x24)
-        self.send_data2([color] * int(self.height * linewidth))  
+        self.send_data2(bytes([color]) * int(self.height * linewidth))
         self.TurnOnDisplay()
 
     '''
@@ -30,8 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import packing
 from PIL import Image
-import RPi.GPIO as GPIO
 
 # Display resolution
 EPD_WIDTH       = 104
@@ -180,9 +180,7 @@ class EPD:
     
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            self.send_command(0x71)
-            epdconfig.delay_ms(100)  
+        epdconfig.wait_until_idle(1)
         logger.debug("e-Paper busy release")
         
     def TurnOnDisplay(self):
@@ -262,28 +260,7 @@ class EPD:
         self.send_data2(self.lut_bb1)
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return packing.pack_1bpp(image, self.width, self.height)
 
     def display(self, image):
         if (Image == None):
@@ -295,7 +272,7 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0x00] * self.height * linewidth)
+        self.send_data2(b'\x00' * self.height * linewidth)
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
@@ -309,38 +286,39 @@ class EPD:
         if (Image == None):
             return
             
+        self.display_region(image, 0, 0, self.width, self.height)
+        
+    def display_region(self, buffer, x, y, w, h):
+        # Partial refresh of the byte-aligned window x, y, w, h (pixels) of a full frame buffer
+        linewidth = (self.width + 7) // 8
+        window = packing.byte_window(self.width, self.height, x, y, w, h)
+        if window is None:
+            return
+        x0, y0, x1, y1 = window
+        image = packing.crop_rows(buffer, linewidth, self.height, x0, y0, x1, y1)
+
         self.send_command(0x91)
         self.send_command(0x90)
-        self.send_data(0)
-        self.send_data(self.width - 1)
+        self.send_data(x0 * 8)
+        self.send_data(x1 * 8 - 1)
 
-        self.send_data(0)
-        self.send_data(0)
-        self.send_data(int(self.height / 256))
-        self.send_data(self.height % 256 - 1)
+        self.send_data(y0 >> 8)
+        self.send_data(y0 & 0xFF)
+        self.send_data((y1 - 1) >> 8)
+        self.send_data((y1 - 1) & 0xFF)
         self.send_data(0x28)
         
-        if self.width%8 == 0:
-            linewidth = int(self.width/8)
-        else:
-            linewidth = int(self.width/8) + 1
-
-        buf = [0x00] * self.height * linewidth
-
-        for i in range(self.height * linewidth):
-            buf[i] = ~image[i]
-        
         self.send_command(0x10)
         self.send_data2(image)
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
-        self.send_data2(buf)
+        self.send_data2(packing.inverted(image))
         epdconfig.delay_ms(10)
         
         self.SetPartReg()
         self.TurnOnDisplay()
-        
+
     def Clear(self):
         if self.width%8 == 0:
             linewidth = int(self.width/8)
@@ -348,11 +326,11 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0x00] * self.height * linewidth)
+        self.send_data2(b'\x00' * self.height * linewidth)
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
-        self.send_data2([0xFF] * self.height * linewidth)
+        self.send_data2(b'\xff' * self.height * linewidth)
         epdconfig.delay_ms(10)
         
         self.SetFullReg()
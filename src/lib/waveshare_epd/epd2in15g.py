@@ -30,9 +30,9 @@
 
 import logging
 from . import epdconfig
+from . import packing
 
 import PIL
-from PIL import Image
 import io
 
 # Display resolution
@@ -86,8 +86,7 @@ class EPD:
     def ReadBusy(self):
         logger.debug("e-Paper busy H")
         epdconfig.delay_ms(100)
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(5)
+        epdconfig.wait_until_idle(1)
         logger.debug("e-Paper busy release")
         
     def TurnOnDisplay(self):
@@ -174,37 +173,14 @@ class EPD:
         self.ReadBusy()
         return 0
 
-    def getbuffer(self, image):
-        # Create a pallette with the 4 colors supported by the panel
-        pal_image = Image.new("P", (1,1))
-        pal_image.putpalette( (0,0,0,  255,255,255,  255,255,0,   255,0,0) + (0,0,0)*252)
-
-        # Check if we need to rotate the image
-        imwidth, imheight = image.size
-        if(imwidth == self.width and imheight == self.height):
-            image_temp = image
-        elif(imwidth == self.height and imheight == self.width):
-            image_temp = image.rotate(90, expand=True)
-        else:
-            logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, self.width, self.height))
-
-        # Convert the soruce image to the 4 colors, dithering if needed
-        image_4color = image_temp.convert("RGB").quantize(palette=pal_image)
-        buf_4color = bytearray(image_4color.tobytes('raw'))
-
-        # into a single byte to transfer to the panel
-        if self.width % 4 == 0 :
-            Width = self.width // 4
-        else :
-            Width = self.width // 4 + 1
-        Height = self.height 
-        buf = [0x00] * int(Width * Height)
-        idx = 0
-        for j in range(0, Height):
-            for i in range(0, Width):
-                    buf[i + j * Width] = (buf_4color[idx] << 6) + (buf_4color[idx+1] << 4) + (buf_4color[idx+2] << 2) + buf_4color[idx+3]
-                    idx = idx + 4
-        return buf
+    def getbuffer(self, image, dither=packing.DITHER_FLOYD_STEINBERG):
+        # Map the source image onto the 4 panel colors, dithering if needed
+        image_4color = packing.quantize(image, self.width, self.height, packing.PALETTE_4COLOR, dither)
+        if image_4color is None:
+            return bytearray([0x55]) * (((self.width + 3) // 4) * self.height)
+
+        # PIL packs the 2 bit color indices four to a byte for the panel
+        return packing.pack_2bpp(image_4color)
 
     def display(self, image):
         self.send_command(0x10)
@@ -220,9 +196,7 @@ class EPD:
         Height = self.height
 
         self.send_command(0x10)
-        for j in range(0, Height):
-            for i in range(0, Width):
-                    self.send_data(color)
+        self.send_data2(bytes([color]) * (Width * Height))
         self.TurnOnDisplay()
 
     def sleep(self):
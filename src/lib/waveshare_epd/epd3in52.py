@@ -30,6 +30,7 @@
 import logging
 from multiprocessing.reduction import recv_handle
 from . import epdconfig
+from . import packing
 
 # Display resolution
 EPD_WIDTH       = 240
@@ -224,8 +225,7 @@ class EPD:
         
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      #  0: busy, 1: idle
-            epdconfig.delay_ms(5) 
+        epdconfig.wait_until_idle(1)
         logger.debug("e-Paper busy release")
 
     def lut(self) :
@@ -352,28 +352,7 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return packing.pack_1bpp(image, self.width, self.height)
 
     def display(self, image):
         if (image == None):
@@ -384,68 +363,71 @@ class EPD:
     def display_NUM(self, NUM):
         # pcnt = 0
 
+        def pattern(row, column):
+            if NUM == self.WHITE:
+                return 0xFF
+            elif NUM == self.BLACK:
+                return 0x00
+            elif NUM == self.Source_Line:
+                return 0xAA
+            elif NUM == self.Gate_Line:
+                if(column%2):
+                    return 0xff # An odd number of Gate line
+                else:
+                    return 0x00 # The even line Gate
+            elif NUM == self.Chessboard:
+                if(row>=(self.width/8/2) and column>=(self.height/2)):
+                    return 0xff
+                elif(row<(self.width/8/2) and column<(self.height/2)):
+                    return 0xff
+                else:
+                    return 0x00
+            elif NUM == self.LEFT_BLACK_RIGHT_WHITE:
+                if(row>=(self.width/8/2)):
+                    return 0xff
+                else:
+                    return 0x00
+            elif NUM == self.UP_BLACK_DOWN_WHITE:
+                if(column>=(self.height/2)):
+                    return 0xFF
+                else:
+                    return 0x00
+            elif NUM == self.Frame:
+                if(column==0 or column==(self.height-1)):
+                    return 0x00
+                elif(row==0):
+                    return 0x7F
+                elif(row==(self.width/8-1)):
+                    return 0xFE
+                else:
+                    return 0xFF
+            elif NUM == self.Crosstalk:
+                if((row>=(self.width/8/3) and row<=(self.width/8/3*2) and column<=(self.height/3)) or (row>=(self.width/8/3) and row<=(self.width/8/3*2) and column>=(self.height/3*2))):
+                    return 0x00
+                else:
+                    return 0xFF
+            return None
+
         self.send_command(0x13);		     #Transfer new data
+        if NUM == self.Image:
+            for i in range(0, self.height * (self.width//8)):
+                epdconfig.delay_ms(1)
+                # self.send_data(gImage_1[pcnt++])
+            return
+
+        # Build the whole test pattern, then send it in one transfer
+        data = bytearray()
         for column in range(0, self.height):
             for row in range(0, self.width//8):
-                if NUM == self.WHITE:
-                    self.send_data(0xFF)
-                        
-                elif NUM == self.BLACK:
-                    self.send_data(0x00)
-                        
-                elif NUM == self.Source_Line:
-                    self.send_data(0xAA)
-                        
-                elif NUM == self.Gate_Line:
-                    if(column%2):
-                        self.send_data(0xff) # An odd number of Gate line  
-                    else:
-                        self.send_data(0x00) # The even line Gate  
-                        
-                elif NUM == self.Chessboard:
-                    if(row>=(self.width/8/2) and column>=(self.height/2)):
-                        self.send_data(0xff)
-                    elif(row<(self.width/8/2) and column<(self.height/2)):
-                        self.send_data(0xff)									
-                    else:
-                        self.send_data(0x00)	
-                        
-                elif NUM == self.LEFT_BLACK_RIGHT_WHITE:
-                    if(row>=(self.width/8/2)):
-                        self.send_data(0xff)
-                    else:
-                        self.send_data(0x00)
-                            
-                elif NUM == self.UP_BLACK_DOWN_WHITE:
-                    if(column>=(self.height/2)):
-                        self.send_data(0xFF)
-                    else:
-                        self.send_data(0x00)
-                            
-                elif NUM == self.Frame:
-                    if(column==0 or column==(self.height-1)):
-                        self.send_data(0x00)					
-                    elif(row==0):
-                        self.send_data(0x7F)
-                    elif(row==(self.width/8-1)):
-                        self.send_data(0xFE);					
-                    else:
-                        self.send_data(0xFF);				
-                            
-                elif NUM == self.Crosstalk:
-                    if((row>=(self.width/8/3) and row<=(self.width/8/3*2) and column<=(self.height/3)) or (row>=(self.width/8/3) and row<=(self.width/8/3*2) and column>=(self.height/3*2))):
-                        self.send_data(0x00)
-                    else:
-                        self.send_data(0xFF)				
-                            
-                elif NUM == self.Image:
-                    epdconfig.delay_ms(1)
-                    # self.send_data(gImage_1[pcnt++])
+                value = pattern(row, column)
+                if value is not None:
+                    data.append(value)
+        self.send_data2(data)
  
         
     def Clear(self):
         self.send_command(0x13);		     # Transfer new data
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.lut_GC()
         self.refresh()
 
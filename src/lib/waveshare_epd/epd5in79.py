@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import packing
 
 # Display resolution
 EPD_WIDTH       = 792
@@ -127,8 +128,7 @@ class EPD:
         
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)
+        epdconfig.wait_until_idle(0)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
@@ -371,64 +371,10 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy * self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return packing.pack_1bpp(image, self.width, self.height)
     
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i=0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((x + (y * self.width))/4)] = ((pixels[x-3, y]&0xc0) | (pixels[x-2, y]&0xc0)>>2 | (pixels[x-1, y]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6)
-                        
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = self.height - x - 1
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((newx + (newy * self.width))/4)] = ((pixels[x, y-3]&0xc0) | (pixels[x, y-2]&0xc0)>>2 | (pixels[x, y-1]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6) 
-        return buf
+        return packing.pack_2bpp_gray(image, self.width, self.height)
 
     def display(self, imageblack):
         Width =int(self.width / 16)+1
@@ -438,13 +384,13 @@ class EPD:
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 : i * Width1+Width])
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.send_command(0xA4)
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.TurnOnDisplay()
 
@@ -456,13 +402,13 @@ class EPD:
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 : i * Width1+Width])
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.send_command(0xA4)
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.TurnOnDisplay()
 
@@ -479,22 +425,22 @@ class EPD:
         Width1 =int(self.width / 8)
         
         self.send_command(0x24)
-        self.send_data2([color] * 13600)
+        self.send_data2(bytes([color]) * 13600)
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.send_command(0xA4)
-        self.send_data2([color] * 13600)
+        self.send_data2(bytes([color]) * 13600)
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.TurnOnDisplay()
 
         self.send_command(0x26)
-        self.send_data2([color] * 13600)
+        self.send_data2(bytes([color]) * 13600)
 
         self.send_command(0xA6)
-        self.send_data2([color] * 13600)
+        self.send_data2(bytes([color]) * 13600)
 
     def display_Fast(self, imageblack):
         Width =int(self.width / 16)+1
@@ -504,161 +450,104 @@ class EPD:
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 : i * Width1+Width])
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.send_command(0xA4)
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.TurnOnDisplay_Fast()
     
     def display_Partial(self, Image):
+        self.display_region(Image, 0, 0, self.width, self.height)
+
+    # Program one controller's RAM window and counters; the slave's commands are the master's | 0x80
+    def SetRamArea(self, slave, x_start, x_end, y_start, y_end):
+        high = 0x80 if slave else 0x00
+        self.send_command(0x44 | high)  # Set Ram X- address Start / End position
+        self.send_data(x_start)
+        self.send_data(x_end)
+        self.send_command(0x45 | high)  # Set Ram Y- address  Start / End position
+        self.send_data(y_start & 0xFF)
+        self.send_data(y_start >> 8)
+        self.send_data(y_end & 0xFF)
+        self.send_data(y_end >> 8)
+
+        self.send_command(0x4e | high)
+        self.send_data(x_start)
+        self.send_command(0x4f | high)
+        self.send_data(y_start & 0xFF)
+        self.send_data(y_start >> 8)
+
+    def display_region(self, buffer, x, y, w, h):
+        # Partial refresh of the byte-aligned window x, y, w, h (pixels) of a full frame buffer
         Width =int(self.width / 16)+1
         Width1 =int(self.width / 8)
-        Height = self.height
-        self.send_command(0x44)	 
-        self.send_data(0x00)     						
-        self.send_data(0x31) 
-        self.send_command(0x45)	
-        self.send_data(0x0f)  
-        self.send_data(0x01)            # 300-1	
-        self.send_data(0x00)     		# YEnd L
-        self.send_data(0x00)			# YEnd H 									
-
-        self.send_command(0x4e)	 						 
-        self.send_data(0x00)	
-        self.send_command(0x4f)	 
-        self.send_data(0x0f)  
-        self.send_data(0x01) 	
-
-        self.send_command(0x24)
-        for i in range(Height):
-            self.send_data2(Image[i * Width1 : i * Width1+Width])
-
-        self.send_command(0xC4)		    # Set Ram X- address Start / End position
-        self.send_data(0x31)     		# XStart, POR = 00h
-        self.send_data(0x00)            # 400/8-1
-        self.send_command(0xC5)	 	    # Set Ram Y- address  Start / End position 
-        self.send_data(0x0f)  
-        self.send_data(0x01)            # 300-1	
-        self.send_data(0x00)     		# YEnd L
-        self.send_data(0x00)			# YEnd H 
-
-        self.send_command(0xCe)	 						 
-        self.send_data(0x31)	
-        self.send_command(0xCf)	 
-        self.send_data(0x0f)  
-        self.send_data(0x01)
-
-        self.send_command(0xA4)
-        for i in range(Height):
-            self.send_data2(Image[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
+        window = packing.byte_window(self.width, self.height, x, y, w, h)
+        if window is None:
+            return
+        x0, y0, x1, y1 = window
+        # Both controllers count Y down, so frame row k is RAM row height-1-k
+        y_start, y_end = self.height - 1 - y0, self.height - y1
+
+        # The master takes bytes 0..Width-1 of each row at the same addresses, the slave
+        # bytes Width-1..Width1-1 at mirrored addresses, sharing the byte in the middle
+        if x0 < Width:
+            self.SetRamArea(False, x0, min(x1, Width) - 1, y_start, y_end)
+            self.send_command(0x24)
+            self.send_data2(packing.crop_rows(buffer, Width1, self.height, x0, y0, min(x1, Width), y1))
+
+        if x1 > Width - 1:
+            sx0 = max(x0, Width - 1)
+            self.SetRamArea(True, Width1 - 1 - sx0, Width1 - x1, y_start, y_end)
+            self.send_command(0xA4)
+            self.send_data2(packing.crop_rows(buffer, Width1, self.height, sx0, y0, x1, y1))
+
+        if window != (0, 0, Width1, self.height):
+            # display() and the other full-frame writes expect the whole RAM windows
+            self.SetRamArea(False, 0, Width - 1, self.height - 1, 0)
+            self.SetRamArea(True, Width - 1, 0, self.height - 1, 0)
 
         self.TurnOnDisplay_Partial()
 
-
     def display_4Gray(self, image):
         Width =int(self.width / 16)+1
         Width1 =int(self.width / 8)
 
+        # Plane bits for black, dark grey, light grey and white
+        plane1, plane2 = packing.split_gray4(image, (0, 1, 0, 1), (0, 0, 1, 1))
+        # The master takes the first Width bytes of each row, the slave the last Width
+        # bytes, sharing the byte in the middle
+        rows = range(0, Width1 * self.height, Width1)
+        master = [b''.join(plane[r:r + Width] for r in rows) for plane in (plane1, plane2)]
+        slave = [b''.join(plane[r + Width - 1:r + 2 * Width - 1] for r in rows) for plane in (plane1, plane2)]
+
         self.send_command(0x24)
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x00 
-                        else: #0x40
-                            temp3 |= 0x01 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
-            
-        self.send_command(0x26)	       
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x01 
-                        else: #0x40
-                            temp3 |= 0x00 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
+        self.send_data2(master[0])
+
+        self.send_command(0x26)
+        self.send_data2(master[1])
 
         self.send_command(0xA4)
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i + Width - 1)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x00 
-                        else: #0x40
-                            temp3 |= 0x01 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
-            
-        self.send_command(0xA6)	       
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i + Width - 1)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x01 
-                        else: #0x40
-                            temp3 |= 0x00 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
-        
+        self.send_data2(slave[0])
+
+        self.send_command(0xA6)
+        self.send_data2(slave[1])
+
         self.TurnOnDisplay_4GRAY()
 
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xFF] * 13600)
+        self.send_data2(b'\xff' * 13600)
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.send_command(0xA4)
-        self.send_data2([0xFF] * 13600)
+        self.send_data2(b'\xff' * 13600)
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.TurnOnDisplay()
 
@@ -75,8 +75,7 @@ class EPD:
         
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)    
+        epdconfig.wait_until_idle(1)
         logger.debug("e-Paper busy release")
         
     def init(self):
@@ -166,7 +165,7 @@ class EPD:
         self.ReadBusy()
         
     def Clear(self):
-        buf = [0x33] * int(self.width * self.height / 2)
+        buf = bytes([0x33]) * (self.width * self.height // 2)
         self.send_command(0x10)
         self.send_data2(buf)
         self.send_command(0x12)
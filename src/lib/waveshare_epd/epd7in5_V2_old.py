@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import packing
 
 # Display resolution
 EPD_WIDTH       = 800
@@ -230,10 +231,7 @@ class EPD:
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0x71)
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 0):
-            self.send_command(0x71)
-            busy = epdconfig.digital_read(self.busy_pin)
+        epdconfig.wait_until_idle(1)
         epdconfig.delay_ms(20)
         logger.debug("e-Paper busy release")
         
@@ -425,24 +423,7 @@ class EPD:
     
 
     def getbuffer(self, image):
-        img = image
-        imwidth, imheight = img.size
-        if(imwidth == self.width and imheight == self.height):
-            img = img.convert('1')
-        elif(imwidth == self.height and imheight == self.width):
-            # image has correct dimensions, but needs to be rotated
-            img = img.rotate(90, expand=True).convert('1')
-        else:
-            logger.warning("Wrong image dimensions: must be " + str(self.width) + "x" + str(self.height))
-            # return a blank buffer
-            return [0x00] * (int(self.width/8) * self.height)
-
-        buf = bytearray(img.tobytes('raw'))
-        # The bytes need to be inverted, because in the PIL world 0=black and 1=white, but
-        # in the e-paper world 0=white and 1=black.
-        for i in range(len(buf)):
-            buf[i] ^= 0xFF
-        return buf
+        return packing.pack_1bpp(image, self.width, self.height, invert=True, blank=0x00, rotate_first=True)
 
     def display(self, image):
         if(self.width % 8 == 0):
@@ -450,12 +431,8 @@ class EPD:
         else:
             Width = self.width // 8 +1
         Height = self.height
-        image1 = [0xFF] * int(self.width * self.height / 8)
-        for j in range(Height):
-                for i in range(Width):
-                    image1[i + j * Width] = ~image[i + j * Width]
         self.send_command(0x10)
-        self.send_data2(image1)
+        self.send_data2(packing.inverted(image[:Width * Height]))
 
         self.send_command(0x13)
         self.send_data2(image)
@@ -466,9 +443,9 @@ class EPD:
 
     def Clear(self):
         self.send_command(0x10)
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.send_command(0x13)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         self.send_command(0x12)
         epdconfig.delay_ms(100)
         self.ReadBusy()
@@ -506,10 +483,9 @@ class EPD:
         self.send_data ((Yend-1)%256)  #y-end
         self.send_data (0x01)
 
-        image1 = [0xFF] * int(self.width * self.height / 8)
-        for j in range(Height):
-                for i in range(Width):
-                    image1[i + j * Width] = ~Image[i + j * Width]
+        # The window's bytes inverted, then white up to a full frame
+        image1 = packing.inverted(Image[:Width * Height])
+        image1 += b'\xff' * (int(self.width * self.height / 8) - len(image1))
 
         self.send_command(0x13)   #Write Black and White image to RAM
         self.send_data2(image1)
@@ -518,6 +494,15 @@ class EPD:
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
+    def display_region(self, buffer, x, y, w, h):
+        # Partial refresh of the byte-aligned window x, y, w, h (pixels) of a full frame buffer
+        window = packing.byte_window(self.width, self.height, x, y, w, h)
+        if window is None:
+            return
+        x0, y0, x1, y1 = window
+        self.display_Partial(packing.crop_rows(buffer, self.width // 8, self.height, x0, y0, x1, y1),
+                             x0 * 8, y0, x1 * 8, y1)
+
     def sleep(self):
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
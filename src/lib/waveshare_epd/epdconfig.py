@@ -32,11 +32,97 @@ import logging
 import sys
 import time
 import subprocess
+import collections
 
 from ctypes import *
 
 logger = logging.getLogger(__name__)
 
+# Default SPI clock; EPD_SPI_HZ or set_spi_speed() override it per panel
+SPI_SPEED_HZ = 4000000
+# Largest single spidev transfer, set by the kernel module parameter
+SPIDEV_BUFSIZ_PATH = '/sys/module/spidev/parameters/bufsiz'
+SPIDEV_BUFSIZ_DEFAULT = 4096
+# Longest a controller operation may hold BUSY; EPD_BUSY_TIMEOUT or set_busy_timeout() override it
+BUSY_TIMEOUT_S = 60.0
+busy_timeout = float(os.environ.get('EPD_BUSY_TIMEOUT', BUSY_TIMEOUT_S))
+# Seconds spent in each recent busy wait, newest last
+busy_waits = collections.deque(maxlen=64)
+# Longest single wait_for_edge call, which bounds how late a missed edge is noticed
+EDGE_SLICE_S = 0.1
+
+
+class BusyTimeout(TimeoutError):
+    """The panel held its BUSY pin for longer than the busy timeout."""
+
+
+def spidev_bufsiz():
+    """The kernel's spidev transfer limit in bytes, or the 4096 byte default."""
+    try:
+        with open(SPIDEV_BUFSIZ_PATH) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return SPIDEV_BUFSIZ_DEFAULT
+
+
+def as_buffer(data):
+    """A memoryview of `data` without copying bytes-likes; int lists are packed once."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return memoryview(data).cast('B')
+    try:
+        return memoryview(bytearray(data))
+    except ValueError:
+        # Some drivers send ~byte, which spidev used to truncate to 8 bits
+        return memoryview(bytearray(b & 0xFF for b in data))
+
+
+def write_chunked(write, data, bufsiz, speed_hz):
+    """Send `data` through `write` in slices of at most `bufsiz` bytes, logging throughput."""
+    view = as_buffer(data)
+    started = time.perf_counter()
+    for offset in range(0, len(view), bufsiz):
+        write(view[offset:offset + bufsiz])
+    elapsed = time.perf_counter() - started
+    if elapsed > 0 and logger.isEnabledFor(logging.DEBUG):
+        rate = len(view) / elapsed
+        logger.debug("spi: %d bytes in %.2f ms, %.0f bytes/s (%.0f%% of %d Hz)",
+                     len(view), elapsed * 1000, rate, rate * 800 / speed_hz, speed_hz)
+
+
+def set_busy_timeout(seconds):
+    global busy_timeout
+    busy_timeout = seconds
+
+
+def wait_until_idle(idle_level, timeout=None):
+    """Block until the BUSY pin reads `idle_level`, sleeping until the pin changes instead of polling.
+
+    Returns the seconds waited, which are also appended to `busy_waits`.
+    Raises BusyTimeout when the pin does not change within `timeout` seconds.
+    """
+    timeout = busy_timeout if timeout is None else timeout
+    started = time.monotonic()
+    released = implementation.wait_for_busy(idle_level, timeout)
+    waited = time.monotonic() - started
+    busy_waits.append(waited)
+    if not released:
+        raise BusyTimeout(f"e-Paper still busy after {timeout:g} s")
+    logger.debug("busy: released after %.1f ms", waited * 1000)
+    return waited
+
+
+def wait_for_edge(gpio, pin, level, timeout):
+    """Block on edges of an RPi.GPIO-style `pin` until it reads `level`; False after `timeout` seconds."""
+    edge = gpio.RISING if level else gpio.FALLING
+    deadline = time.monotonic() + timeout
+    while gpio.input(pin) != level:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        # Short slices: an edge between input() and wait_for_edge() would otherwise be missed
+        gpio.wait_for_edge(pin, edge, timeout=max(1, int(min(remaining, EDGE_SLICE_S) * 1000)))
+    return True
+
 
 class RaspberryPi:
     # Pin definition
@@ -53,6 +139,8 @@ class RaspberryPi:
         import gpiozero
         
         self.SPI = spidev.SpiDev()
+        self.spi_speed_hz = int(os.environ.get('EPD_SPI_HZ', SPI_SPEED_HZ))
+        self.spi_bufsiz = spidev_bufsiz()
         self.GPIO_RST_PIN    = gpiozero.LED(self.RST_PIN)
         self.GPIO_DC_PIN     = gpiozero.LED(self.DC_PIN)
         # self.GPIO_CS_PIN     = gpiozero.LED(self.CS_PIN)
@@ -95,6 +183,12 @@ class RaspberryPi:
         elif pin == self.PWR_PIN:
             return self.PWR_PIN.value
 
+    def wait_for_busy(self, idle_level, timeout):
+        # gpiozero's Button sets an event from the pin's edge callback
+        if idle_level:
+            return self.GPIO_BUSY_PIN.wait_for_press(timeout)
+        return self.GPIO_BUSY_PIN.wait_for_release(timeout)
+
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
@@ -102,7 +196,12 @@ class RaspberryPi:
         self.SPI.writebytes(data)
 
     def spi_writebyte2(self, data):
-        self.SPI.writebytes2(data)
+        write_chunked(self.SPI.writebytes2, data, self.spi_bufsiz, self.spi_speed_hz)
+
+    def set_spi_speed(self, hz):
+        self.spi_speed_hz = hz
+        if self.SPI.fileno() != -1:
+            self.SPI.max_speed_hz = hz
 
     def DEV_SPI_write(self, data):
         self.DEV_SPI.DEV_SPI_SendData(data)
@@ -141,7 +240,7 @@ class RaspberryPi:
         else:
             # SPI device, bus = 0, device = 0
             self.SPI.open(0, 0)
-            self.SPI.max_speed_hz = 4000000
+            self.SPI.max_speed_hz = self.spi_speed_hz
             self.SPI.mode = 0b00
         return 0
 
@@ -198,6 +297,9 @@ class JetsonNano:
     def digital_read(self, pin):
         return self.GPIO.input(self.BUSY_PIN)
 
+    def wait_for_busy(self, idle_level, timeout):
+        return wait_for_edge(self.GPIO, self.BUSY_PIN, idle_level, timeout)
+
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
@@ -205,8 +307,12 @@ class JetsonNano:
         self.SPI.SYSFS_software_spi_transfer(data[0])
 
     def spi_writebyte2(self, data):
-        for i in range(len(data)):
-            self.SPI.SYSFS_software_spi_transfer(data[i])
+        for byte in as_buffer(data):
+            self.SPI.SYSFS_software_spi_transfer(byte)
+
+    def set_spi_speed(self, hz):
+        # The sysfs software SPI runs at a fixed rate
+        pass
 
     def module_init(self):
         self.GPIO.setmode(self.GPIO.BCM)
@@ -249,6 +355,8 @@ class SunriseX3:
 
         self.GPIO = Hobot.GPIO
         self.SPI = spidev.SpiDev()
+        self.spi_speed_hz = int(os.environ.get('EPD_SPI_HZ', SPI_SPEED_HZ))
+        self.spi_bufsiz = spidev_bufsiz()
 
     def digital_write(self, pin, value):
         self.GPIO.output(pin, value)
@@ -256,6 +364,9 @@ class SunriseX3:
     def digital_read(self, pin):
         return self.GPIO.input(pin)
 
+    def wait_for_busy(self, idle_level, timeout):
+        return wait_for_edge(self.GPIO, self.BUSY_PIN, idle_level, timeout)
+
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
@@ -265,7 +376,12 @@ class SunriseX3:
     def spi_writebyte2(self, data):
         # for i in range(len(data)):
         #     self.SPI.writebytes([data[i]])
-        self.SPI.xfer3(data)
+        write_chunked(self.SPI.xfer3, data, self.spi_bufsiz, self.spi_speed_hz)
+
+    def set_spi_speed(self, hz):
+        self.spi_speed_hz = hz
+        if self.Flag:
+            self.SPI.max_speed_hz = hz
 
     def module_init(self):
         if self.Flag == 0:
@@ -282,7 +398,7 @@ class SunriseX3:
         
             # SPI device, bus = 0, device = 0
             self.SPI.open(2, 0)
-            self.SPI.max_speed_hz = 4000000
+            self.SPI.max_speed_hz = self.spi_speed_hz
             self.SPI.mode = 0b00
             return 0
         else:
@@ -301,20 +417,228 @@ class SunriseX3:
         self.GPIO.cleanup([self.RST_PIN, self.DC_PIN, self.CS_PIN, self.BUSY_PIN], self.PWR_PIN)
 
 
-if sys.version_info[0] == 2:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE)
-else:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
-output, _ = process.communicate()
-if sys.version_info[0] == 2:
-    output = output.decode(sys.stdout.encoding)
-
-if "Raspberry" in output:
-    implementation = RaspberryPi()
-elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
-    implementation = SunriseX3()
+class VirtualPanel:
+    """Hardware-free backend that records the SPI stream and simulates the BUSY pin.
+
+    Selected with EPD_BACKEND=virtual. Frames written to RAM (0x10/0x13,
+    0x24/0x26) are kept in `frames` (the last FRAMES_KEPT) on every refresh
+    command and, when EPD_VIRTUAL_OUTPUT names a directory, saved there as
+    .raw and .png.
+    Partial windows set with 0x90 are composed into a full framebuffer.
+    EPD_VIRTUAL_SIZE (WxH), EPD_VIRTUAL_BUSY_LEVEL (level digital_read returns
+    while busy, or "toggle" to alternate on every read and never wait) and
+    EPD_VIRTUAL_SPEED (time scale, 0 = no waiting) tune the simulation.
+    wait_for_busy sleeps out the simulated busy time whatever level the
+    driver waits for.
+    Setting `transcript` to a list records [command, data] pairs into it.
+    """
+    # Pin definition
+    RST_PIN  = 17
+    DC_PIN   = 25
+    CS_PIN   = 8
+    BUSY_PIN = 24
+    PWR_PIN  = 18
+
+    # Simulated busy time in ms after commands that start a controller operation
+    BUSY_MS = {0x04: 100, 0x02: 100, 0x12: 1600, 0x20: 1600}
+    RAM_COMMANDS = (0x10, 0x13, 0x24, 0x26)
+    REFRESH_COMMANDS = (0x12, 0x20)
+    FRAMES_KEPT = 16
+    # Byte inversion for bytes.translate, as in packing (which needs PIL, so is not imported here)
+    INVERT_TABLE = bytes(0xFF - i for i in range(256))
+
+    class _Bus:
+        def __init__(self, panel):
+            self.panel = panel
+            self.max_speed_hz = int(os.environ.get('EPD_SPI_HZ', SPI_SPEED_HZ))
+            self.mode = 0b00
+
+        def writebytes(self, data):
+            self.panel.spi_writebyte(data)
+
+        def writebytes2(self, data):
+            self.panel.spi_writebyte2(data)
+
+        def xfer3(self, data):
+            self.panel.spi_writebyte2(data)
+
+        def open(self, bus, device):
+            pass
+
+        def close(self):
+            pass
+
+    def __init__(self):
+        size = os.environ.get('EPD_VIRTUAL_SIZE', '800x480')
+        self.width, self.height = (int(v) for v in size.lower().split('x'))
+        busy_level = os.environ.get('EPD_VIRTUAL_BUSY_LEVEL', '0')
+        self.busy_level = None if busy_level == 'toggle' else int(busy_level)
+        self.busy_toggle = 0
+        self.speed = float(os.environ.get('EPD_VIRTUAL_SPEED', '1'))
+        self.output_dir = os.environ.get('EPD_VIRTUAL_OUTPUT')
+        self.SPI = self._Bus(self)
+        self.spi_bufsiz = SPIDEV_BUFSIZ_DEFAULT
+        self.pins = {}
+        self.command = None
+        self.data = bytearray()
+        self.ram = {}
+        self.window = None
+        self.invert = False
+        self.framebuffer = bytearray(b'\xff' * (self.width // 8 * self.height))
+        self.frames = collections.deque(maxlen=self.FRAMES_KEPT)
+        self.frame_count = 0
+        self.bytes_sent = 0
+        self.commands_sent = 0
+        self.busy_until = 0.0
+        self.transcript = None
+
+    def digital_write(self, pin, value):
+        if pin == self.RST_PIN and self.pins.get(pin) and not value:
+            # A hardware reset drops the partial window, polarity and any half-sent command
+            self.command = None
+            self.data = bytearray()
+            self.window = None
+            self.invert = False
+        self.pins[pin] = value
+
+    def digital_read(self, pin):
+        if pin == self.BUSY_PIN:
+            if self.busy_level is None:
+                self.busy_toggle ^= 1
+                return self.busy_toggle
+            busy = time.monotonic() < self.busy_until
+            return self.busy_level if busy else 1 - self.busy_level
+        return self.pins.get(pin, 0)
+
+    def wait_for_busy(self, idle_level, timeout):
+        # The simulation knows when it is busy, so the driver's polarity does not matter
+        if self.busy_level is None:
+            return True
+        remaining = self.busy_until - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return False
+        if remaining > 0:
+            time.sleep(remaining)
+        return True
+
+    def delay_ms(self, delaytime):
+        time.sleep(delaytime * self.speed / 1000.0)
+
+    def spi_writebyte(self, data):
+        self._receive(data)
+
+    def spi_writebyte2(self, data):
+        write_chunked(self._receive, data, self.spi_bufsiz, self.SPI.max_speed_hz)
+
+    def set_spi_speed(self, hz):
+        self.SPI.max_speed_hz = hz
+
+    def DEV_SPI_write(self, data):
+        self._receive([data])
+
+    def DEV_SPI_nwrite(self, data):
+        self._receive(data)
+
+    def DEV_SPI_read(self):
+        return 0
+
+    def _receive(self, data):
+        data = bytes(as_buffer(data))
+        self.bytes_sent += len(data)
+        if self.pins.get(self.DC_PIN, 0):
+            self.data += data
+            if self.transcript is not None:
+                if not self.transcript:
+                    self.transcript.append([None, bytearray()])
+                self.transcript[-1][1] += data
+            return
+        for command in data:
+            if self.transcript is not None:
+                self.transcript.append([command, bytearray()])
+            self._finish_command()
+            self.command = command
+            self.commands_sent += 1
+            busy_ms = self.BUSY_MS.get(command)
+            if busy_ms:
+                self.busy_until = time.monotonic() + busy_ms * self.speed / 1000.0
+            if command in self.REFRESH_COMMANDS:
+                self._capture_frame()
+
+    def _finish_command(self):
+        if self.command in self.RAM_COMMANDS:
+            self.ram[self.command] = bytes(self.data)
+            if self.command in (0x13, 0x24):
+                self._compose(self.data)
+        elif self.command == 0x90 and len(self.data) >= 8:
+            d = self.data
+            self.window = ((d[0] << 8 | d[1]), (d[2] << 8 | d[3]) + 1,
+                           (d[4] << 8 | d[5]), (d[6] << 8 | d[7]) + 1)
+        elif self.command == 0x50 and self.data:
+            # DDX bit 0 flips the polarity of new data (UC8179 partial mode uses 0xA9)
+            self.invert = bool(self.data[0] & 0x01)
+        elif self.command == 0x92:
+            self.window = None
+        self.command = None
+        self.data = bytearray()
+
+    def _compose(self, data):
+        if self.invert:
+            data = bytes(data).translate(self.INVERT_TABLE)
+        stride = self.width // 8
+        if self.window is None:
+            if len(data) == len(self.framebuffer):
+                self.framebuffer[:] = data
+            return
+        x0, x1, y0, y1 = self.window
+        row = (x1 - x0) // 8
+        for i, y in enumerate(range(y0, min(y1, self.height))):
+            chunk = data[i * row:(i + 1) * row]
+            start = y * stride + x0 // 8
+            self.framebuffer[start:start + len(chunk)] = chunk
+
+    def _capture_frame(self):
+        frame = bytes(self.framebuffer)
+        self.frames.append(frame)
+        self.frame_count += 1
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            name = os.path.join(self.output_dir, 'frame_%04d' % self.frame_count)
+            with open(name + '.raw', 'wb') as f:
+                f.write(frame)
+            try:
+                from PIL import Image
+                # The panel stores black as 1, PIL's '1' mode stores white as 1
+                inverted = frame.translate(self.INVERT_TABLE)
+                Image.frombytes('1', (self.width, self.height), inverted).save(name + '.png')
+            except ImportError:
+                pass
+        logger.debug("virtual panel captured frame %d", self.frame_count)
+
+    def module_init(self, cleanup=False):
+        return 0
+
+    def module_exit(self, cleanup=False):
+        logger.debug("virtual panel exit")
+
+
+if os.environ.get('EPD_BACKEND', '').lower() == 'virtual':
+    implementation = VirtualPanel()
 else:
-    implementation = JetsonNano()
+    if sys.version_info[0] == 2:
+        process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE)
+    else:
+        process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
+    output, _ = process.communicate()
+    if sys.version_info[0] == 2:
+        output = output.decode(sys.stdout.encoding)
+
+    if "Raspberry" in output:
+        implementation = RaspberryPi()
+    elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
+        implementation = SunriseX3()
+    else:
+        implementation = JetsonNano()
 
 for func in [x for x in dir(implementation) if not x.startswith('_')]:
     setattr(sys.modules[__name__], func, getattr(implementation, func))
@@ -0,0 +1,309 @@
+# /*****************************************************************************
+# * | File        :	  packing.py
+# * | Function    :   Shared frame buffer packing for the e-paper drivers
+# * | Info        :
+# *----------------
+# * | The drivers used to pack pixels with per-pixel Python loops. These
+# * | helpers do the same work with PIL's C conversions and bytes.translate.
+# ******************************************************************************
+
+import logging
+from functools import lru_cache
+
+from PIL import Image, ImageChops
+
+logger = logging.getLogger(__name__)
+
+# Maps every byte to its bitwise complement
+INVERT_TABLE = bytes(0xFF - i for i in range(256))
+
+
+def inverted(buf):
+    """Return a bytearray with every bit of `buf` flipped."""
+    return bytearray(buf).translate(INVERT_TABLE)
+
+
+def pack_rows(mono):
+    """Pack a '1' image MSB first, padding each row to a whole byte with white bits."""
+    imwidth, imheight = mono.size
+    if imwidth % 8:
+        canvas = Image.new('1', ((imwidth + 7) // 8 * 8, imheight), 255)
+        canvas.paste(mono, (0, 0))
+        mono = canvas
+    return bytearray(mono.tobytes('raw'))
+
+
+def pack_1bpp(image, width, height, invert=False, blank=0xFF, rotate_first=False):
+    """Pack `image` into a width x height 1bpp panel buffer, 1 = white unless `invert`.
+
+    An image of height x width is rotated 90 degrees counterclockwise. By default it
+    is converted to '1' first, as the per-pixel driver loops did; `rotate_first`
+    rotates before dithering and keeps PIL's own row padding, as the drivers built on
+    Image.tobytes did. Any other size logs a warning and returns a buffer of `blank`.
+    """
+    imwidth, imheight = image.size
+    if (imwidth, imheight) == (width, height):
+        mono = image.convert('1')
+    elif (imwidth, imheight) == (height, width):
+        if rotate_first:
+            mono = image.rotate(90, expand=True).convert('1')
+        else:
+            mono = image.convert('1').transpose(Image.Transpose.ROTATE_90)
+    else:
+        logger.warning("Wrong image dimensions: must be " + str(width) + "x" + str(height))
+        return bytearray([blank]) * ((width + 7) // 8 * height)
+
+    buf = bytearray(mono.tobytes('raw')) if rotate_first else pack_rows(mono)
+    if invert:
+        buf = buf.translate(INVERT_TABLE)
+    return buf
+
+
+def _merge(parts, length):
+    """OR together equally long byte strings, returning a bytearray of `length`."""
+    merged = 0
+    for part in parts:
+        merged |= int.from_bytes(part, 'big')
+    return bytearray(merged.to_bytes(length, 'big'))
+
+
+def _gray4_level(value):
+    # The drivers remap 0xC0 and 0x80 down one level before keeping the top two bits
+    if value == 0xC0:
+        return 2
+    if value == 0x80:
+        return 1
+    return value >> 6
+
+
+GRAY4_LEVELS = bytes(_gray4_level(v) for v in range(256))
+# One table per position in a byte: grey value -> its 2-bit level shifted into place
+_GRAY4_SHIFTED = [bytes(level << (6 - 2 * k) for level in GRAY4_LEVELS) for k in range(4)]
+
+
+def pack_2bpp_gray(image, width, height, transpose=Image.Transpose.ROTATE_90, blank=0xFF):
+    """Quantize `image` to four grey levels and pack them 2 bits per pixel, MSB first.
+
+    Levels run 0 (black) to 3 (white). An image of height x width is turned with
+    `transpose` first; any other size returns a buffer of `blank`.
+    """
+    imwidth, imheight = image.size
+    gray = image.convert('L')
+    if (imwidth, imheight) == (width, height):
+        pass
+    elif (imwidth, imheight) == (height, width):
+        gray = gray.transpose(transpose)
+    else:
+        return bytearray([blank]) * (width // 4 * height)
+
+    raw = gray.tobytes('raw')
+    length = len(raw) // 4
+    return _merge((raw[k::4].translate(_GRAY4_SHIFTED[k]) for k in range(4)), length)
+
+
+def _plane_tables(levels):
+    # Packed 2bpp byte -> the 4 plane bits of its pixels, as high and low nibble
+    nibbles = []
+    for byte in range(256):
+        nibble = 0
+        for k in range(4):
+            nibble = nibble << 1 | levels[byte >> (6 - 2 * k) & 0x03]
+        nibbles.append(nibble)
+    return bytes(n << 4 for n in nibbles), bytes(nibbles)
+
+
+def split_gray4(buf, *planes):
+    """Split a pack_2bpp_gray buffer into 1bpp controller planes.
+
+    Each plane is given as a 4-tuple of the bit written for levels 0 (black),
+    1 (dark grey), 2 (light grey) and 3 (white). Returns one bytearray per plane.
+    """
+    buf = bytes(bytearray(buf))
+    even, odd = buf[0::2], buf[1::2]
+    result = []
+    for levels in planes:
+        high, low = _plane_tables(tuple(levels))
+        result.append(_merge((even.translate(high), odd.translate(low)), len(buf) // 2))
+    return result
+
+
+DITHER_NONE = 'none'
+DITHER_FLOYD_STEINBERG = 'floyd-steinberg'
+DITHER_ORDERED = 'ordered'
+
+# Black, white, green, blue, red, yellow, orange: the 7-color ACeP panels
+PALETTE_7COLOR = (0, 0, 0, 255, 255, 255, 0, 255, 0, 0, 0, 255, 255, 0, 0, 255, 255, 0, 255, 128, 0)
+
+_BAYER_4X4 = (0, 8, 2, 10, 12, 4, 14, 6, 3, 11, 1, 9, 15, 7, 13, 5)
+# Spread of the ordered dither threshold, in 8-bit channel steps
+ORDERED_SPREAD = 128
+
+
+@lru_cache(maxsize=8)
+def palette_image(colors):
+    """A 'P' image carrying `colors` (flat RGB tuple), for Image.quantize."""
+    pal_image = Image.new("P", (1, 1))
+    pal_image.putpalette(colors + (0, 0, 0) * (256 - len(colors) // 3))
+    return pal_image
+
+
+@lru_cache(maxsize=4)
+def _ordered_offsets(size):
+    tile = Image.new('L', (4, 4))
+    tile.putdata([round((v + 0.5) / 16 * ORDERED_SPREAD) for v in _BAYER_4X4])
+    width, height = size
+    band = Image.new('L', size)
+    for y in range(0, height, 4):
+        for x in range(0, width, 4):
+            band.paste(tile, (x, y))
+    return Image.merge('RGB', (band, band, band))
+
+
+def quantize(image, width, height, colors, dither=DITHER_FLOYD_STEINBERG):
+    """Map `image` onto the palette `colors`, returning a width x height 'P' image.
+
+    An image of height x width is rotated 90 degrees counterclockwise first, and
+    any other size returns None. `dither` is DITHER_NONE (nearest color),
+    DITHER_FLOYD_STEINBERG or DITHER_ORDERED (4x4 Bayer threshold).
+    """
+    imwidth, imheight = image.size
+    if (imwidth, imheight) == (width, height):
+        pass
+    elif (imwidth, imheight) == (height, width):
+        image = image.rotate(90, expand=True)
+    else:
+        logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, width, height))
+        return None
+
+    rgb = image.convert("RGB")
+    if dither == DITHER_ORDERED:
+        rgb = ImageChops.add(rgb, _ordered_offsets(rgb.size), 1.0, -(ORDERED_SPREAD // 2))
+    mode = Image.Dither.FLOYDSTEINBERG if dither == DITHER_FLOYD_STEINBERG else Image.Dither.NONE
+    return rgb.quantize(palette=palette_image(colors), dither=mode)
+
+
+def exact_colors(image, width, height, colors, fallback=0):
+    """Like quantize without dithering, but pixels not exactly in `colors` get index `fallback`."""
+    indexed = quantize(image, width, height, colors, DITHER_NONE)
+    if indexed is None:
+        return None
+    rgb = image.convert("RGB") if image.size == (width, height) else image.rotate(90, expand=True).convert("RGB")
+    bands = ImageChops.difference(rgb, indexed.convert("RGB")).split()
+    mismatch = ImageChops.lighter(ImageChops.lighter(bands[0], bands[1]), bands[2])
+    indexed.paste(fallback, mask=mismatch.point(lambda v: 255 if v else 0, '1'))
+    return indexed
+
+
+def pack_4bpp(indexed):
+    """Pack a 'P' image two pixels per byte, the left pixel in the high nibble."""
+    return bytearray(indexed.tobytes('raw', 'P;4'))
+
+
+# Black, white, yellow, red: the 4-color "g" panels
+PALETTE_4COLOR = (0, 0, 0, 255, 255, 255, 255, 255, 0, 255, 0, 0)
+
+
+def pack_2bpp(indexed):
+    """Pack a 'P' image four pixels per byte, the leftmost pixel in the top bits.
+
+    Rows whose width is not a multiple of 4 end in a partly used byte padded with 0.
+    """
+    return bytearray(indexed.tobytes('raw', 'P;2'))
+
+
+# Black/white/accent palette index -> plane bit, 0 = ink
+_NOT_BLACK = bytes([0, 1, 1]) + bytes(253)
+_NOT_ACCENT = bytes([1, 1, 0]) + bytes(253)
+
+
+def tricolor_planes(image, width, height, accent=(255, 0, 0), dither=DITHER_NONE, pad_white=True):
+    """Split `image` into black and accent 1bpp planes in one quantization pass.
+
+    Pixels are mapped to the nearest of black, white and `accent`. Both planes use
+    the getbuffer convention of 1 = white and 0 = ink; None means a wrong size.
+    Rows are padded like pack_rows unless `pad_white` is False, which keeps PIL's
+    0 padding as pack_1bpp does with `rotate_first`.
+    """
+    indexed = quantize(image, width, height, (0, 0, 0, 255, 255, 255) + tuple(accent), dither)
+    if indexed is None:
+        return None
+    indices = indexed.tobytes('raw')
+    pack = pack_rows if pad_white else lambda mono: bytearray(mono.tobytes('raw'))
+    return [pack(Image.frombytes('1', indexed.size, indices.translate(table), 'raw', '1;8'))
+            for table in (_NOT_BLACK, _NOT_ACCENT)]
+
+
+def merge_nibbles(black, accent, width, height):
+    """Merge black and accent 1bpp planes (0 = ink) into the bc 4-bit format.
+
+    Accent wins over black where both are inked, as the controllers expect.
+    """
+    size = (width, height)
+    codes = Image.frombytes('1', size, bytes(black)).point(lambda v: 0x3 if v else 0x0, 'L')
+    codes.paste(0x4, mask=ImageChops.invert(Image.frombytes('1', size, bytes(accent))))
+    return pack_4bpp(Image.frombytes('P', size, codes.tobytes()))
+
+
+def widen(buf, high, low):
+    """Translate every byte of `buf` into two bytes, high[b] followed by low[b]."""
+    buf = bytes(bytearray(buf))
+    out = bytearray(2 * len(buf))
+    out[0::2] = buf.translate(high)
+    out[1::2] = buf.translate(low)
+    return out
+
+
+def _doubled(nibble):
+    # Each of the 4 bits, MSB first, becomes a pair of equal bits
+    return sum(0xC0 >> (2 * k) for k in range(4) if nibble & (0x08 >> k))
+
+
+_DOUBLE_HIGH = bytes(_doubled(b >> 4) for b in range(256))
+_DOUBLE_LOW = bytes(_doubled(b & 0x0F) for b in range(256))
+
+
+def double_bits(buf):
+    """Repeat every bit of a 1bpp buffer, giving the 2-bit format some old controllers take."""
+    return widen(buf, _DOUBLE_HIGH, _DOUBLE_LOW)
+
+
+def _pair_code(pair):
+    # 2bpp pair -> 4-bit pixel code: 11 white, 00 black, anything else red
+    return 0x3 if pair == 0x3 else 0x0 if pair == 0x0 else 0x4
+
+
+_PAIRS_HIGH = bytes(_pair_code(b >> 6) << 4 | _pair_code(b >> 4 & 0x3) for b in range(256))
+_PAIRS_LOW = bytes(_pair_code(b >> 2 & 0x3) << 4 | _pair_code(b & 0x3) for b in range(256))
+
+
+def pairs_to_nibbles(buf):
+    """Expand a 2bpp black/red/white buffer into the 4-bit pixel codes, two pixels per byte."""
+    return widen(buf, _PAIRS_HIGH, _PAIRS_LOW)
+
+
+def byte_window(width, height, x, y, w, h):
+    """Clip a pixel box to the panel and widen it to whole bytes.
+
+    Returns (x0, y0, x1, y1) with x in bytes and ends exclusive, or None when
+    nothing of the box is on the panel.
+    """
+    x0, y0 = max(x, 0) // 8, max(y, 0)
+    x1, y1 = (min(x + w, width) + 7) // 8, min(y + h, height)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+def crop_rows(buf, stride, rows, x0, y0, x1, y1):
+    """Bytes x0..x1 of rows y0..y1 (ends exclusive) of a buffer `stride` bytes wide.
+
+    The window is clipped to the `rows` x `stride` buffer. Rows are sliced from
+    a memoryview, so only the returned window is copied.
+    """
+    if not isinstance(buf, (bytes, bytearray, memoryview)):
+        buf = bytearray(buf)
+    view = memoryview(buf).cast('B')
+    x0, x1 = max(x0, 0), min(x1, stride)
+    if x1 <= x0:
+        return b''
+    return b''.join(view[y * stride + x0:y * stride + x1] for y in range(max(y0, 0), min(y1, rows)))
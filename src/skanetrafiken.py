@@ -1,11 +1,22 @@
-import requests
-import re
-from datetime import datetime, timedelta
+import logging
+import threading
+from src.departure import Departure
 from src.time_manager import TimeManager
+from src.http_session import HttpSession
+from src.response_cache import ResponseCache, FRESH, STALE
+from src.journey_decoder import decode_journeys
+from src.request_coalescer import RequestCoalescer, default_coalescer
+
+JOURNEY_PATH = "/gw-tps/api/v2/Journey"
 
 class JourneyPlanner:
-    def __init__(self, from_point_id, to_point_id):
-        self.url = "https://www.skanetrafiken.se/gw-tps/api/v2/Journey"
+    def __init__(self, from_point_id, to_point_id, session: HttpSession = None,
+                 cache: ResponseCache = None, coalescer: RequestCoalescer = None,
+                 base_url: str = None):
+        self.session = session or HttpSession()
+        self.cache = cache
+        self.coalescer = coalescer or default_coalescer
+        self.url = (base_url or self.session.config.base_url).rstrip("/") + JOURNEY_PATH
         self.from_point_id = from_point_id
         self.to_point_id = to_point_id
         self.time_manager = TimeManager()
@@ -27,61 +38,103 @@ class JourneyPlanner:
             "search-engine-environment": "TjP",
         }
 
-    def extract_time(self, timestamp):
-            """Extracts hours and minutes from a timestamp and converts to Sweden time."""
-            pattern = r"(\d{2}):(\d{2})"
-            match = re.search(pattern, timestamp)
-            if match:
-                time_str = match.group(1) + ":" + match.group(2)
-                return self.time_manager.convert_to_sweden_time(time_str)
-            return timestamp
-
-
     def get_route_status(self, route_info):
-        """Returns the formatted time with status (e.g., 'Cancelled' if applicable)."""
-        time_departure = self.extract_time(route_info["routeLinks"][0]["from"]["time"])
-        time_arrival = self.extract_time(route_info["routeLinks"][0]["to"]["time"])
-        try:
-            delay_time = route_info["routeLinks"][0]["from"]["deviation"]
-        except KeyError:
-            delay_time = None
+        """Returns a Departure record for the first route link of a journey."""
+        route_from = route_info["routeLinks"][0]["from"]
+        route_to = route_info["routeLinks"][0]["to"]
+        departure = self.time_manager.parse_timestamp(route_from["time"])
         if "deviationTag" in route_info and route_info["deviationTag"]["text"] == "INSTÄLLD":
-            return {"departure": time_departure, "arrival": "Cancelled", "track": "Cancelled"}
-        else:
-            track = route_info["routeLinks"][0]["from"]["pos"]
-            return {"departure": time_departure, "arrival": time_arrival, "track": track, "delay": delay_time}
+            return Departure(departure, None, cancelled=True)
+
+        arrival = self.time_manager.parse_timestamp(route_to["time"])
+        # The API reports the deviation in whole minutes.
+        deviation = route_from.get("deviation")
+        delay = int(deviation * 60) if deviation is not None else None
+        track = str(route_from.get("pos") or "").split(" ")[-1]
+        return Departure(departure, arrival, delay=delay, track=track)
 
     def filter_upcoming_journeys(self, journey_times):
         """Filters out journeys that have already departed or depart in the next 5 minutes."""
-        upcoming_journeys = []
-        
-        for journey in journey_times:
-            departure_str = journey["departure"]
-            if departure_str == "Cancelled":
-                continue
-                
-            if self.time_manager.is_future_time(departure_str, min_minutes_ahead=5):
-                upcoming_journeys.append(journey)
-                
-        return sorted(upcoming_journeys, key=lambda x: x["departure"])
+        upcoming_journeys = [
+            journey for journey in journey_times
+            if self.time_manager.is_future_timestamp(journey.departure, min_minutes_ahead=5)
+        ]
+        return sorted(upcoming_journeys, key=lambda x: x.departure)
     
+    @property
+    def cache_key(self):
+        return (self.url, tuple(sorted(self.params.items())))
+
+    def fetch_route_statuses(self):
+        """Returns the unfiltered route statuses, sharing any identical request already in flight."""
+        return self.coalescer.run(self.cache_key, self._request_route_statuses)
+
+    def _request_route_statuses(self):
+        """Requests the journeys from the API and returns their unfiltered route statuses."""
+        with self.session.get(self.url, params=self.params, headers=self.headers,
+                              stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Request failed with status code {response.status_code}")
+            response.raw.decode_content = True
+            journeys = decode_journeys(response.raw)
+
+        route_statuses = []
+        for route in journeys:
+            try:
+                route_statuses.append(self.get_route_status(route))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logging.warning(f"Skipping malformed journey: {e!r}")
+        return route_statuses
+
+    def _refresh_cache(self, key):
+        try:
+            self.cache.put(key, self.fetch_route_statuses())
+        except Exception as e:
+            logging.error(f"Background refresh failed for {self.from_point_id} -> {self.to_point_id}: {e}")
+        finally:
+            self.cache.end_refresh(key)
+
     def get_journey_times(self):
         """Fetches and returns the journey times as a dictionary."""
-        response = requests.get(self.url, params=self.params, headers=self.headers)
+        if self.cache is None:
+            return self.filter_upcoming_journeys(self.fetch_route_statuses())
 
-        if response.status_code == 200:
-            data = response.json()
-            journeys = data.get("journeys", [])
-            journey_times = [self.get_route_status(route) for route in journeys]
-            journey_times = self.filter_upcoming_journeys(journey_times)
-            return journey_times
-        else:
-            raise Exception(f"Request failed with status code {response.status_code}")
+        key = self.cache_key
+        journey_times, state = self.cache.lookup(key)
+        if state == STALE and self.cache.begin_refresh(key):
+            threading.Thread(target=self._refresh_cache, args=(key,), daemon=True).start()
+        elif state not in (FRESH, STALE):
+            journey_times = self.fetch_route_statuses()
+            self.cache.put(key, journey_times)
+        return self.filter_upcoming_journeys(journey_times)
 
 if __name__ == "__main__":
-    journey_planner_lund = JourneyPlanner("9021012080040000", "9021012081216000")
+    import argparse
+    from src.config import HttpConfig
+
+    parser = argparse.ArgumentParser(description="Query a journey and print the upcoming departures.")
+    parser.add_argument("--from-point", default="9021012080040000")
+    parser.add_argument("--to-point", default="9021012081216000")
+    parser.add_argument("--base-url", help="API base URL, e.g. a local benchmarks.mock_api server")
+    parser.add_argument("--record", metavar="PATH", help="save the raw Journey response as a fixture")
+    args = parser.parse_args()
+
+    http_config = HttpConfig()
+    if args.base_url:
+        http_config.base_url = args.base_url
+    journey_planner_lund = JourneyPlanner(args.from_point, args.to_point,
+                                          session=HttpSession(http_config))
+    if args.record:
+        response = journey_planner_lund.session.get(journey_planner_lund.url,
+                                                    params=journey_planner_lund.params,
+                                                    headers=journey_planner_lund.headers)
+        with open(args.record, "wb") as fixture:
+            fixture.write(response.content)
+        print(f"Recorded {len(response.content)} bytes to {args.record}")
     try:
         journey_times = journey_planner_lund.get_journey_times()
         print(journey_times)
     except Exception as e:
-        print(e)
\ No newline at end of file
+        print(e)
+    print(journey_planner_lund.session.stats())
+    print(journey_planner_lund.coalescer.stats())
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.font_registry import font_registry
+
+
+class TextRunCache:
+    """LRU cache of pre-rasterized 1-bit text runs keyed by (font, size, text)."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._runs: "OrderedDict[tuple, Tuple[Image.Image, Tuple[int, int]]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, font: ImageFont.FreeTypeFont, text: str) -> Tuple[Image.Image, Tuple[int, int]]:
+        """Return (mask, offset) for `text`; the mask is pasted at the text origin plus offset."""
+        key = (font.path, font.size, text)
+        run = self._runs.get(key)
+        if run is not None:
+            self._runs.move_to_end(key)
+            self._stats["hits"] += 1
+            return run
+
+        self._stats["misses"] += 1
+        left, top, right, bottom = font_registry.textbbox(font, text, mode='1')
+        mask = Image.new('1', (max(right - left, 1), max(bottom - top, 1)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=1)
+        run = (mask, (left, top))
+        self._runs[key] = run
+        if len(self._runs) > self.max_entries:
+            self._runs.popitem(last=False)
+            self._stats["evictions"] += 1
+        return run
+
+    def draw(self, image: Image.Image, xy: Tuple[int, int], text: str,
+             font: ImageFont.FreeTypeFont, fill: int = 0) -> Tuple[int, int, int, int]:
+        """Paste the cached run for `text` at `xy` and return the box it covers."""
+        mask, (left, top) = self.get(font, text)
+        x, y = xy[0] + left, xy[1] + top
+        image.paste(fill, (x, y, x + mask.width, y + mask.height), mask)
+        return x, y, x + mask.width, y + mask.height
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, entries=len(self._runs))
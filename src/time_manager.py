@@ -1,45 +1,108 @@
+from bisect import bisect_right
 from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+import time
 import pytz
 
+_EPOCH = datetime(1970, 1, 1)
+_DAY = 86400
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
 class TimeManager:
+    # year -> (transition epochs, UTC offsets in seconds), shared by all instances
+    _offset_tables: Dict[int, Tuple[List[int], List[int]]] = {}
+
     def __init__(self):
         self.sweden_tz = pytz.timezone('Europe/Stockholm')
-    
+        self._table_start = self._table_end = 0
+        self._transitions: List[int] = []
+        self._offsets: List[int] = []
+
     def get_current_time(self) -> str:
         """Get current time in Sweden in HH:MM format."""
-        return datetime.now(self.sweden_tz).strftime('%H:%M')
-    
-    def convert_to_sweden_time(self, time_str: str) -> str:
-        """Converts a time string from UTC to Swedish time."""
-        try:
-            time_obj = datetime.strptime(time_str, "%H:%M")
-            utc_time = pytz.UTC.localize(datetime.combine(datetime.utcnow().date(), time_obj.time()))
-            sweden_time = utc_time.astimezone(self.sweden_tz)
-            return sweden_time.strftime("%H:%M")
-        except ValueError:
-            return time_str
-
-    
-    def is_future_time(self, time_str: str, min_minutes_ahead: int = 5) -> bool:
-        """Check if a time (already in Swedish time) is at least `min_minutes_ahead` minutes in the future."""
+        return self.format_time(int(time.time()))
+
+    def parse_timestamp(self, timestamp: str) -> int:
+        """Parses an ISO 8601 API timestamp into epoch seconds; timestamps without an offset are UTC."""
         try:
+            if timestamp[4] != '-' or timestamp[7] != '-' or timestamp[10] not in 'T ' \
+                    or timestamp[13] != ':' or timestamp[16] != ':':
+                raise ValueError(timestamp)
+            days = _days_from_civil(int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]))
+            seconds = (days * _DAY + int(timestamp[11:13]) * 3600
+                       + int(timestamp[14:16]) * 60 + int(timestamp[17:19]))
+
+            rest = timestamp[19:]
+            if rest.startswith('.'):
+                rest = rest.lstrip('.0123456789')
+            if rest in ('', 'Z'):
+                return seconds
+            if rest[0] in '+-' and len(rest) == 6 and rest[3] == ':':
+                offset = int(rest[1:3]) * 3600 + int(rest[4:6]) * 60
+                return seconds - offset if rest[0] == '+' else seconds + offset
+        except (IndexError, ValueError):
+            pass
+
+        parsed = datetime.fromisoformat(timestamp)
+        if parsed.tzinfo is None:
+            parsed = pytz.UTC.localize(parsed)
+        return int(parsed.timestamp())
+
+    def utc_offset(self, timestamp: int) -> int:
+        """Europe/Stockholm UTC offset in seconds at the given epoch time."""
+        if not self._table_start <= timestamp < self._table_end:
+            self._load_offset_table(time.gmtime(timestamp).tm_year)
+        return self._offsets[bisect_right(self._transitions, timestamp) - 1]
+
+    def format_time(self, timestamp: int) -> str:
+        """Formats epoch seconds as HH:MM in Swedish time."""
+        local = timestamp + self.utc_offset(timestamp)
+        return f"{local // 3600 % 24:02d}:{local // 60 % 60:02d}"
+
+    def is_future_timestamp(self, timestamp: int, min_minutes_ahead: int = 5) -> bool:
+        """Check if epoch seconds are at least `min_minutes_ahead` minutes in the future."""
+        return timestamp > time.time() + min_minutes_ahead * 60
+
+    def _load_offset_table(self, year: int) -> None:
+        table = self._offset_tables.get(year)
+        if table is None:
+            table = self._offset_tables[year] = self._build_offset_table(year)
+        self._transitions, self._offsets = table
+        self._table_start = _days_from_civil(year, 1, 1) * _DAY
+        self._table_end = _days_from_civil(year + 1, 1, 1) * _DAY
 
-            current_time = datetime.now(self.sweden_tz)
-            time_obj = datetime.strptime(time_str, "%H:%M").time()
-            check_time = self.sweden_tz.localize(
-                datetime.combine(current_time.date(), time_obj)
-            )
-            if check_time < current_time - timedelta(hours=1):
-                check_time += timedelta(days=1)
-            return check_time > current_time + timedelta(minutes=min_minutes_ahead)
-
-        except ValueError:
-            return False
-
-    
-    def convert_to_sweden_datetime(self, time_str: str) -> datetime:
-        """Converts a time string (HH:MM in UTC) to a full Sweden-localized datetime object."""
-        time_obj = datetime.strptime(time_str, "%H:%M")  # Parse time as HH:MM
-        utc_time = pytz.UTC.localize(datetime.combine(datetime.utcnow().date(), time_obj.time()))  
-        return utc_time.astimezone(self.sweden_tz)  # Convert to Sweden time
+    def _build_offset_table(self, year: int) -> Tuple[List[int], List[int]]:
+        """Finds the offset changes (DST transitions) within a year, to the second."""
+        start = _days_from_civil(year, 1, 1) * _DAY
+        end = _days_from_civil(year + 1, 1, 1) * _DAY
+        transitions = [start]
+        offsets = [self._offset_at(start)]
+        day = start
+        while day < end:
+            next_day = min(day + _DAY, end - 1)
+            if self._offset_at(next_day) != offsets[-1]:
+                low, high = day, next_day
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if self._offset_at(middle) == offsets[-1]:
+                        low = middle
+                    else:
+                        high = middle
+                transitions.append(high)
+                offsets.append(self._offset_at(high))
+            day += _DAY
+        return transitions, offsets
 
+    def _offset_at(self, timestamp: int) -> int:
+        utc_time = _EPOCH + timedelta(seconds=timestamp)
+        return int(self.sweden_tz.fromutc(utc_time).utcoffset().total_seconds())